@@ -0,0 +1,237 @@
+import argparse
+import sys
+import time
+
+from balls import DIAMETER, BALL_RADIUS, INF, sweep_box
+from bench import scripted_paddle
+from engine import World, Inputs
+from replay import LEFT_DOWN, LEFT_UP, RIGHT_DOWN, RIGHT_UP
+
+MAX_BOUNCES = 64
+MAX_TICKS = 20000
+SLIPPERY_DECAY = 0.95
+
+
+class Prediction:
+    __slots__ = ("start", "segments", "index", "land_tick", "x")
+
+    def __init__(self, start, segments, land_tick=INF, x=None):
+        self.start = start
+        self.segments = segments
+        self.index = 0
+        self.land_tick = land_tick
+        self.x = x
+
+    def follows(self, ticks, dx, dy):
+        elapsed = ticks - self.start
+        segments = self.segments
+        i = self.index
+        while i + 1 < len(segments) and elapsed > segments[i][0] + 1:
+            i += 1
+        self.index = i
+        end, seg_dx, seg_dy = segments[i]
+        if dx == seg_dx and dy == seg_dy:
+            return True
+        if i + 1 < len(segments) and elapsed >= end - 1:
+            _, next_dx, next_dy = segments[i + 1]
+            return dx == next_dx and dy == next_dy
+        return False
+
+
+def brick_band(bricks, y, dy, t):
+    bounds = bricks.bounds()
+    if bounds is None:
+        return None
+    top, bottom = bounds[1] - DIAMETER, bounds[3]
+    if dy == 0:
+        return (0.0, t) if top <= y <= bottom else None
+    t1, t2 = sorted(((top - y) / dy, (bottom - y) / dy))
+    t1, t2 = max(t1, 0.0), min(t2, t)
+    return (t1, t2) if t1 <= t2 else None
+
+
+def predict(world, ticks, x, y, dx, dy, plane):
+    right = world.board.width - DIAMETER
+    bricks = None if world.ghostball else world.bricks
+    gone = set()
+    elapsed = 0.0
+    segments = []
+    for _ in range(MAX_BOUNCES):
+        t, flip_x, flip_y, landing = INF, False, False, False
+        if dx:
+            t, flip_x = max(0.0, (-x if dx < 0 else right - x) / dx), True
+        if dy < 0:
+            ty = max(0.0, -y / dy)
+            if ty < t:
+                t, flip_x, flip_y = ty, False, True
+        elif dy > 0:
+            if y > plane:
+                break
+            ty = (plane - y) / dy
+            if ty <= t:
+                t, landing = ty, True
+        if t == INF:
+            break
+
+        band = brick_band(bricks, y, dy, t) if bricks else None
+        if band:
+            mx, my = dx * t, dy * t
+            t1, t2 = band
+            sx1, sx2 = sorted((x + dx * t1, x + dx * t2))
+            sy1, sy2 = sorted((y + dy * t1, y + dy * t2))
+            best, hit_brick = 1.0, None
+            for brick in bricks.query(sx1, sy1, sx2 + DIAMETER, sy2 + DIAMETER):
+                if brick.id in gone:
+                    continue
+                hit = sweep_box(x, y, mx, my, brick.x1, brick.y1, brick.x2, brick.y2)
+                if hit and hit[0] < best:
+                    best, hit_brick = hit[0], brick
+                    _, flip_x, flip_y = hit
+            if hit_brick is not None:
+                t *= best
+                landing = False
+                gone.add(hit_brick.id)
+
+        x += dx * t
+        y += dy * t
+        elapsed += t
+        segments.append((elapsed, dx, dy))
+        if landing:
+            return Prediction(ticks, segments, ticks + elapsed, x + BALL_RADIUS)
+        if elapsed > MAX_TICKS:
+            break
+        if flip_x:
+            dx = -dx
+        if flip_y:
+            dy = -dy
+    segments.append((INF, dx, dy))
+    return Prediction(ticks, segments)
+
+
+def key_changes(state, inputs):
+    if bool(inputs.left) != bool(state.left):
+        yield LEFT_DOWN if inputs.left else LEFT_UP
+    if bool(inputs.right) != bool(state.right):
+        yield RIGHT_DOWN if inputs.right else RIGHT_UP
+
+
+class Autopilot:
+    def __init__(self):
+        self.predictions = {}
+        self.mode = None
+        self.target = None
+        self.decisions = 0
+        self.traces = 0
+
+    def inputs(self, world):
+        self.decisions += 1
+        mode = (world.flipped, world.reverse_controls, world.drunk_direction, "slippery" in world.effects)
+        predictions = self.predictions
+        if mode != self.mode:
+            self.mode = mode
+            predictions.clear()
+
+        store = world.balls
+        n = len(store)
+        if len(predictions) > 2 * n + 16:
+            live = set(store.ids[:n])
+            self.predictions = predictions = {ball_id: p for ball_id, p in predictions.items() if ball_id in live}
+
+        ticks = world.ticks
+        plane = world.paddle.y1 - DIAMETER
+        ids, xs, ys, dxs, dys = store.ids, store.x, store.y, store.dx, store.dy
+        soonest = None
+        soonest_tick = INF
+        for i in range(n):
+            ball_id, dx, dy = ids[i], dxs[i], dys[i]
+            prediction = predictions.get(ball_id)
+            if prediction is None or not prediction.follows(ticks, dx, dy):
+                prediction = predictions[ball_id] = predict(world, ticks, xs[i], ys[i], dx, dy, plane)
+                self.traces += 1
+            if ticks - 1 <= prediction.land_tick < soonest_tick:
+                soonest, soonest_tick = prediction, prediction.land_tick
+        main = predictions.get(world.ball)
+        if soonest is None:
+            self.target = world.board.width / 2
+        elif main is soonest or main is None or main.land_tick == INF or self.reachable(world, soonest, main):
+            self.target = soonest.x
+        else:
+            self.target = main.x
+        return self.steer(world, self.target)
+
+    def reachable(self, world, first, then):
+        paddle = world.paddle
+        reach = (paddle.x2 - paddle.x1) / 2
+        center = (paddle.x1 + paddle.x2) / 2
+        travel = max(0, abs(first.x - center) - reach) + max(0, abs(then.x - first.x) - reach)
+        return travel <= (then.land_tick - world.ticks) * world.paddle_speed
+
+    def steer(self, world, target):
+        paddle, mirror = world.paddle, 1
+        if world.split_paddles:
+            left, right = world.split_paddles
+            if abs((right.x1 + right.x2) / 2 - target) < abs((left.x1 + left.x2) / 2 - target):
+                paddle, mirror = right, -1
+            else:
+                paddle = left
+        error = target - (paddle.x1 + paddle.x2) / 2
+        speed = -world.paddle_speed if world.reverse_controls else world.paddle_speed
+        drift = world.drunk_direction * 2
+        slippery = "slippery" in world.effects
+
+        best, best_miss = 0, INF
+        for direction in (0, -1, 1):
+            dx = speed * direction + drift
+            if slippery:
+                velocity = world.slippery_velocity
+                if drift or direction:
+                    velocity += dx * 0.1
+                else:
+                    velocity *= SLIPPERY_DECAY
+                travel = velocity / (1 - SLIPPERY_DECAY)
+            else:
+                travel = dx
+            miss = abs(error - mirror * travel)
+            if miss < best_miss:
+                best, best_miss = direction, miss
+        return Inputs(left=best < 0, right=best > 0)
+
+
+def play(seed, player, max_ticks):
+    world = World(seed)
+    spent = 0
+    while world.running and world.ticks < max_ticks:
+        start = time.perf_counter_ns()
+        inputs = player(world)
+        spent += time.perf_counter_ns() - start
+        world.step(inputs)
+    return world, spent
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the predictive autopilot with the naive scripted paddle")
+    parser.add_argument("--games", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-ticks", type=int, default=MAX_TICKS)
+    args = parser.parse_args(argv)
+
+    print(f"{'player':<12}{'survived':>10}{'mean score':>12}{'lives lost/10k ticks':>22}{'us/decision':>13}"
+          f"{'traces/100 ticks':>18}")
+    for name in ("autopilot", "scripted"):
+        survived = score = ticks = lost = spent = traces = 0
+        for seed in range(args.seed, args.seed + args.games):
+            pilot = Autopilot()
+            world, used = play(seed, pilot.inputs if name == "autopilot" else scripted_paddle, args.max_ticks)
+            survived += world.running
+            score += world.score
+            ticks += world.ticks
+            lost += 3 - world.lives
+            spent += used
+            traces += pilot.traces
+        print(f"{name:<12}{survived / args.games:>10.0%}{score / args.games:>12.0f}{lost / ticks * 10000:>22.2f}"
+              f"{spent / ticks / 1000:>13.2f}{traces / ticks * 100 if name == 'autopilot' else 0:>18.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,306 @@
+from array import array
+from math import floor
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from constants import BALL_RADIUS
+
+FREE = 0
+SWEEP = 1
+DONE = 2
+MISS = 3
+
+WALL = 1
+FLOOR = 2
+PADDLE = 3
+BRICK = 4
+
+DIAMETER = BALL_RADIUS * 2
+NUMPY_THRESHOLD = 32
+MAX_SUBSTEPS = 4
+STORM_BALLS = 1000
+INF = float("inf")
+
+
+def jitter_value(b):
+    # 252 is the largest multiple of 3 below 256, so -1/0/+1 stay equally likely
+    return b % 3 - 1 if b < 252 else 0
+
+
+def sweep_box(x, y, mx, my, x1, y1, x2, y2):
+    ex1 = x1 - DIAMETER
+    ey1 = y1 - DIAMETER
+    if mx == 0:
+        if x < ex1 or x > x2:
+            return None
+        tx_enter, tx_exit = -INF, INF
+    else:
+        tx_enter, tx_exit = sorted(((ex1 - x) / mx, (x2 - x) / mx))
+    if my == 0:
+        if y < ey1 or y > y2:
+            return None
+        ty_enter, ty_exit = -INF, INF
+    else:
+        ty_enter, ty_exit = sorted(((ey1 - y) / my, (y2 - y) / my))
+    t_enter = max(tx_enter, ty_enter)
+    t_exit = min(tx_exit, ty_exit)
+    if t_enter > t_exit or t_exit < 0 or t_enter > 1:
+        return None
+    if t_enter < 0:
+        overlap_x = min(x + DIAMETER, x2) - max(x, x1)
+        overlap_y = min(y + DIAMETER, y2) - max(y, y1)
+        return 0.0, overlap_x <= overlap_y, overlap_x > overlap_y
+    return t_enter, tx_enter >= ty_enter, ty_enter >= tx_enter
+
+
+class BallStore:
+    def __init__(self):
+        self.count = 0
+        self.ids = array("q")
+        self.x = array("d")
+        self.y = array("d")
+        self.dx = array("d")
+        self.dy = array("d")
+
+    def __len__(self):
+        return self.count
+
+    def add(self, id, x, y, dx, dy):
+        self.ids.append(id)
+        self.x.append(x - BALL_RADIUS)
+        self.y.append(y - BALL_RADIUS)
+        self.dx.append(dx)
+        self.dy.append(dy)
+        self.count += 1
+        return id
+
+    def index(self, id):
+        return self.ids.index(id)
+
+    def center(self, i):
+        return self.x[i] + BALL_RADIUS, self.y[i] + BALL_RADIUS
+
+    def coords(self, i):
+        x, y = self.x[i], self.y[i]
+        return x, y, x + DIAMETER, y + DIAMETER
+
+    def boxes(self):
+        x, y = self.x, self.y
+        for i in range(self.count):
+            yield self.ids[i], x[i], y[i], x[i] + DIAMETER, y[i] + DIAMETER
+
+    def advance(self, world):
+        n = self.count
+        if n == 0:
+            return []
+        use_numpy = np is not None and n >= NUMPY_THRESHOLD
+        if world.confusion:
+            self.jitter(world, n, use_numpy)
+        if use_numpy:
+            results = self.classify_numpy(world, n)
+        else:
+            results = self.classify_python(world, n)
+
+        for i in range(n):
+            if results[i] == SWEEP:
+                results[i] = self.sweep(world, i)
+
+        if use_numpy:
+            return self.apply_numpy(results, n)
+        return self.apply_python(results, n)
+
+    def jitter(self, world, n, use_numpy):
+        raw = world.rng.randbytes(n * 2)
+        if use_numpy:
+            jitter = np.frombuffer(raw, dtype=np.uint8).astype(np.int64)
+            jitter = np.where(jitter < 252, jitter % 3 - 1, 0)
+            np.frombuffer(self.dx, dtype=np.float64, count=n)[:] += jitter[0::2]
+            np.frombuffer(self.dy, dtype=np.float64, count=n)[:] += jitter[1::2]
+        else:
+            dx, dy = self.dx, self.dy
+            for i in range(n):
+                dx[i] += jitter_value(raw[2 * i])
+                dy[i] += jitter_value(raw[2 * i + 1])
+
+    def paddles(self, world):
+        paddles = [world.paddle.coords()]
+        if world.split_paddles:
+            paddles = [p.coords() for p in world.split_paddles] + paddles
+        return paddles
+
+    def classify_python(self, world, n):
+        x, y, dx, dy = self.x, self.y, self.dx, self.dy
+        width, height = world.board.width, world.board.height
+        paddles = self.paddles(world)
+        bricks = None if world.ghostball else world.bricks
+        occupancy = bricks.occupancy() if bricks else None
+        if occupancy:
+            col0, row0, table = occupancy
+            origin_x, origin_y = bricks.origin_x, bricks.origin_y
+            cell_width, cell_height = bricks.cell_width, bricks.cell_height
+            cols, rows = len(table[0]) - 1, len(table) - 1
+        results = [FREE] * n
+        for i in range(n):
+            x1, y1, mx, my = x[i], y[i], dx[i], dy[i]
+            sx1, sx2 = (x1, x1 + mx) if mx >= 0 else (x1 + mx, x1)
+            sy1, sy2 = (y1, y1 + my) if my >= 0 else (y1 + my, y1)
+            sx2 += DIAMETER
+            sy2 += DIAMETER
+            if sx1 <= 0 or sx2 >= width or sy1 <= 0 or sy2 >= height:
+                results[i] = SWEEP
+                continue
+            if occupancy:
+                c1 = floor((sx1 - origin_x) / cell_width) - col0
+                c2 = floor((sx2 - origin_x) / cell_width) - col0 + 1
+                r1 = floor((sy1 - origin_y) / cell_height) - row0
+                r2 = floor((sy2 - origin_y) / cell_height) - row0 + 1
+                if c2 > 0 and c1 < cols and r2 > 0 and r1 < rows:
+                    if c1 < 0:
+                        c1 = 0
+                    if r1 < 0:
+                        r1 = 0
+                    if c2 > cols:
+                        c2 = cols
+                    if r2 > rows:
+                        r2 = rows
+                    if table[r2][c2] - table[r1][c2] - table[r2][c1] + table[r1][c1]:
+                        results[i] = SWEEP
+                        continue
+            for px1, py1, px2, py2 in paddles:
+                if sy2 >= py1 and sy1 <= py2 and sx2 >= px1 and sx1 <= px2:
+                    results[i] = SWEEP
+                    break
+        return results
+
+    def classify_numpy(self, world, n):
+        x = np.frombuffer(self.x, dtype=np.float64, count=n)
+        y = np.frombuffer(self.y, dtype=np.float64, count=n)
+        dx = np.frombuffer(self.dx, dtype=np.float64, count=n)
+        dy = np.frombuffer(self.dy, dtype=np.float64, count=n)
+        sx1 = np.minimum(x, x + dx)
+        sx2 = np.maximum(x, x + dx) + DIAMETER
+        sy1 = np.minimum(y, y + dy)
+        sy2 = np.maximum(y, y + dy) + DIAMETER
+        board = world.board
+        sweep = (sx1 <= 0) | (sx2 >= board.width) | (sy1 <= 0) | (sy2 >= board.height)
+        for px1, py1, px2, py2 in self.paddles(world):
+            sweep |= (sy2 >= py1) & (sy1 <= py2) & (sx2 >= px1) & (sx1 <= px2)
+        occupancy = None if world.ghostball else world.bricks.occupancy()
+        if occupancy:
+            bricks = world.bricks
+            col0, row0, table = occupancy
+            table = np.array(table)
+            rows, cols = table.shape[0] - 1, table.shape[1] - 1
+            c1 = np.clip(np.floor((sx1 - bricks.origin_x) / bricks.cell_width) - col0, 0, cols).astype(np.intp)
+            c2 = np.clip(np.floor((sx2 - bricks.origin_x) / bricks.cell_width) - col0 + 1, 0, cols).astype(np.intp)
+            r1 = np.clip(np.floor((sy1 - bricks.origin_y) / bricks.cell_height) - row0, 0, rows).astype(np.intp)
+            r2 = np.clip(np.floor((sy2 - bricks.origin_y) / bricks.cell_height) - row0 + 1, 0, rows).astype(np.intp)
+            sweep |= table[r2, c2] - table[r1, c2] - table[r2, c1] + table[r1, c1] > 0
+        return np.where(sweep, SWEEP, FREE).tolist()
+
+    def first_hit(self, world, x, y, mx, my, paddles):
+        best = (INF, None, False, False, None)
+        if mx != 0:
+            t = max(0.0, (-x if mx < 0 else world.board.width - DIAMETER - x) / mx)
+            if t <= 1:
+                best = (t, WALL, True, False, None)
+        if my != 0:
+            t = max(0.0, (-y if my < 0 else world.board.height - DIAMETER - y) / my)
+            if t <= 1 and t < best[0]:
+                best = (t, WALL if my < 0 else FLOOR, False, True, None)
+
+            center_y = y + BALL_RADIUS
+            for px1, py1, px2, py2 in paddles:
+                if (center_y < (py1 + py2) / 2) != (my > 0):
+                    continue
+                hit = sweep_box(x, y, mx, my, px1, py1, px2, py2)
+                if hit and hit[0] < best[0]:
+                    best = (hit[0], PADDLE, False, True, None)
+
+        if not world.ghostball:
+            sx1, sx2 = (x, x + mx) if mx >= 0 else (x + mx, x)
+            sy1, sy2 = (y, y + my) if my >= 0 else (y + my, y)
+            for brick in world.bricks.query(sx1, sy1, sx2 + DIAMETER, sy2 + DIAMETER):
+                hit = sweep_box(x, y, mx, my, brick.x1, brick.y1, brick.x2, brick.y2)
+                if hit and hit[0] < best[0]:
+                    best = (hit[0], BRICK, hit[1], hit[2], brick)
+        return best
+
+    def sweep(self, world, i):
+        x, y, dx, dy = self.x[i], self.y[i], self.dx[i], self.dy[i]
+        paddles = self.paddles(world)
+        remaining = 1.0
+        for _ in range(MAX_SUBSTEPS):
+            mx, my = dx * remaining, dy * remaining
+            t, kind, flip_x, flip_y, brick = self.first_hit(world, x, y, mx, my, paddles)
+            if kind is None:
+                x += mx
+                y += my
+                break
+            if kind == FLOOR:
+                return MISS
+            x += mx * t
+            y += my * t
+            remaining *= 1 - t
+            if flip_x:
+                dx = -dx
+            if flip_y:
+                dy = -dy
+            if kind == BRICK:
+                self.x[i], self.y[i], self.dx[i], self.dy[i] = x, y, dx, dy
+                world.hit_brick(brick)
+                paddles = self.paddles(world)
+            if remaining <= 0:
+                break
+        self.x[i], self.y[i], self.dx[i], self.dy[i] = x, y, dx, dy
+        return DONE
+
+    def apply_python(self, results, n):
+        ids, x, y, dx, dy = self.ids, self.x, self.y, self.dx, self.dy
+        missed = []
+        keep = 0
+        for i in range(n):
+            result = results[i]
+            if result == MISS:
+                missed.append(ids[i])
+                continue
+            if keep != i:
+                ids[keep], x[keep], y[keep], dx[keep], dy[keep] = ids[i], x[i], y[i], dx[i], dy[i]
+            if result == FREE:
+                x[keep] += dx[keep]
+                y[keep] += dy[keep]
+            keep += 1
+        if missed:
+            self.compact(keep, n)
+        return missed
+
+    def apply_numpy(self, results, n):
+        results = np.asarray(results, dtype=np.int8)
+        ids = np.frombuffer(self.ids, dtype=np.int64, count=n)
+        x = np.frombuffer(self.x, dtype=np.float64, count=n)
+        y = np.frombuffer(self.y, dtype=np.float64, count=n)
+        dx = np.frombuffer(self.dx, dtype=np.float64, count=n)
+        dy = np.frombuffer(self.dy, dtype=np.float64, count=n)
+        free = results == FREE
+        x[free] += dx[free]
+        y[free] += dy[free]
+        alive = results != MISS
+        missed = ids[~alive].tolist()
+        if missed:
+            keep = int(alive.sum())
+            for column in (ids, x, y, dx, dy):
+                column[:keep] = column[alive]
+            del ids, x, y, dx, dy, column
+            self.compact(keep, n)
+        return missed
+
+    def compact(self, keep, n):
+        ids, x, y, dx, dy = self.ids, self.x, self.y, self.dx, self.dy
+        for i in range(n, self.count):
+            ids[keep], x[keep], y[keep], dx[keep], dy[keep] = ids[i], x[i], y[i], dx[i], dy[i]
+            keep += 1
+        del ids[keep:], x[keep:], y[keep:], dx[keep:], dy[keep:]
+        self.count = keep
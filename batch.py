@@ -0,0 +1,92 @@
+class CanvasBatch:
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.applied_coords = {}
+        self.applied_options = {}
+        self.pending_coords = {}
+        self.pending_options = {}
+        self.applied_labels = {}
+        self.pending_labels = {}
+        self.calls = 0
+        self.last_frame_calls = 0
+        self.max_frame_calls = 0
+        self.frames = 0
+        self.total_calls = 0
+
+    def create_rectangle(self, *coords, **options):
+        return self.created(self.canvas.create_rectangle(*coords, **options), coords, options)
+
+    def create_oval(self, *coords, **options):
+        return self.created(self.canvas.create_oval(*coords, **options), coords, options)
+
+    def create_text(self, *coords, **options):
+        return self.created(self.canvas.create_text(*coords, **options), coords, options)
+
+    def created(self, item, coords, options):
+        self.calls += 1
+        self.applied_coords[item] = tuple(coords)
+        self.applied_options[item] = dict(options)
+        return item
+
+    def tag_raise(self, item):
+        self.calls += 1
+        self.canvas.tag_raise(item)
+
+    def tag_lower(self, item):
+        self.calls += 1
+        self.canvas.tag_lower(item)
+
+    def coords(self, item, *coords):
+        self.pending_coords[item] = coords
+
+    def itemconfig(self, item, **options):
+        pending = self.pending_options.get(item)
+        if pending is None:
+            self.pending_options[item] = options
+        else:
+            pending.update(options)
+
+    def label(self, label, **options):
+        pending = self.pending_labels.get(label)
+        if pending is None:
+            self.pending_labels[label] = options
+        else:
+            pending.update(options)
+
+    def flush(self):
+        canvas = self.canvas
+        applied_coords = self.applied_coords
+        for item, coords in self.pending_coords.items():
+            if applied_coords.get(item) != coords:
+                canvas.coords(item, *coords)
+                applied_coords[item] = coords
+                self.calls += 1
+        self.pending_coords = {}
+
+        for item, options in self.pending_options.items():
+            applied = self.applied_options.setdefault(item, {})
+            changed = {key: value for key, value in options.items() if applied.get(key) != value}
+            if changed:
+                canvas.itemconfig(item, **changed)
+                applied.update(changed)
+                self.calls += 1
+        self.pending_options = {}
+
+        for label, options in self.pending_labels.items():
+            applied = self.applied_labels.setdefault(label, {})
+            changed = {key: value for key, value in options.items() if applied.get(key) != value}
+            if changed:
+                label.config(**changed)
+                applied.update(changed)
+                self.calls += 1
+        self.pending_labels = {}
+
+        self.last_frame_calls = self.calls
+        self.max_frame_calls = max(self.max_frame_calls, self.calls)
+        self.total_calls += self.calls
+        self.frames += 1
+        self.calls = 0
+
+    def stats_text(self):
+        average = self.total_calls / self.frames if self.frames else 0
+        return f"tcl calls/frame: {self.last_frame_calls} (avg {average:.1f}, max {self.max_frame_calls})"
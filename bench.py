@@ -0,0 +1,187 @@
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+
+from balls import STORM_BALLS
+from engine import World, Inputs, CHAOS_EVENTS, TICK_MS
+from levels import Layout
+from profiler import percentile
+
+
+def scripted_paddle(world):
+    ball_x, _ = world.balls.center(world.balls.index(world.ball))
+    center = (world.paddle.x1 + world.paddle.x2) / 2
+    return Inputs(left=ball_x < center - 10, right=ball_x > center + 10)
+
+
+def make_world(seed, multiball_count=1):
+    world = World(seed, multiball_count)
+    world.chaos_chance = 0
+    world.lives = 10 ** 9
+    return world
+
+
+def force_chaos(world, effect):
+    world.activate_chaos(effect, float("inf"))
+
+
+def chaos_scenario(effect):
+    def setup(seed):
+        world = make_world(seed)
+        force_chaos(world, effect)
+        return world, None
+    return setup
+
+
+def multiball_storm(seed):
+    world = make_world(seed, STORM_BALLS)
+    force_chaos(world, "multiball")
+
+    def refill(tick):
+        if len(world.balls) < STORM_BALLS // 2:
+            world.spawn_multiball(STORM_BALLS)
+    return world, refill
+
+
+def gunpad_storm(seed):
+    world = make_world(seed)
+    force_chaos(world, "gunpad")
+    world.every(TICK_MS, world.shoot)
+    return world, None
+
+
+def partybricks_storm(seed):
+    world = make_world(seed, STORM_BALLS)
+    board = world.board
+    full = Layout((1 << board.cells) - 1, bytes(board.cells))
+    world.build_bricks(full)
+    force_chaos(world, "partybricks")
+    force_chaos(world, "multiball")
+
+    def refill(tick):
+        if len(world.bricks) < board.cells // 2:
+            world.build_bricks(full)
+        if len(world.balls) < STORM_BALLS // 2:
+            world.spawn_multiball(STORM_BALLS)
+    return world, refill
+
+
+def mega_chaos(seed):
+    world = make_world(seed)
+    world.set_mega_chaos(True)
+    for effect in CHAOS_EVENTS:
+        force_chaos(world, effect)
+    return world, None
+
+
+def flipview_toggle(seed):
+    world = make_world(seed)
+
+    def toggle(tick):
+        if tick % 30 == 0:
+            if world.flipped:
+                world.clear_chaos()
+            else:
+                force_chaos(world, "flipview")
+    return world, toggle
+
+
+SCENARIOS = {f"chaos_{effect}": chaos_scenario(effect) for effect in CHAOS_EVENTS}
+SCENARIOS.update({
+    "multiball_storm": multiball_storm,
+    "gunpad_storm": gunpad_storm,
+    "partybricks_storm": partybricks_storm,
+    "mega_chaos": mega_chaos,
+    "flipview_toggle": flipview_toggle
+})
+
+
+def run_ticks(world, hook, ticks, latencies=None):
+    clock = time.perf_counter_ns
+    for tick in range(ticks):
+        if hook:
+            hook(tick)
+        inputs = scripted_paddle(world)
+        if latencies is None:
+            world.step(inputs)
+        else:
+            start = clock()
+            world.step(inputs)
+            latencies.append(clock() - start)
+
+
+def run_scenario(name, ticks, seed):
+    setup = SCENARIOS[name]
+    world, hook = setup(seed)
+    latencies = []
+    start = time.perf_counter()
+    run_ticks(world, hook, ticks, latencies)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    world, hook = setup(seed)
+    run_ticks(world, hook, ticks)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "ticks": ticks,
+        "ticks_per_sec": round(ticks / elapsed, 1),
+        "p50_us": percentile(latencies, 50) / 1000,
+        "p99_us": percentile(latencies, 99) / 1000,
+        "peak_kib": round(peak / 1024, 1)
+    }
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result["ticks_per_sec"] < base["ticks_per_sec"] * (1 - threshold):
+            regressions.append(f"{name}: ticks/sec {base['ticks_per_sec']} -> {result['ticks_per_sec']}")
+        if result["p99_us"] > base["p99_us"] * (1 + threshold):
+            regressions.append(f"{name}: p99 {base['p99_us']:.1f}us -> {result['p99_us']:.1f}us")
+        if result["peak_kib"] > base["peak_kib"] * (1 + threshold):
+            regressions.append(f"{name}: peak memory {base['peak_kib']}KiB -> {result['peak_kib']}KiB")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Deterministic ChaosBreakout benchmarks")
+    parser.add_argument("--ticks", type=int, default=3000)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--only", nargs="*", help="scenario names to run")
+    parser.add_argument("--save", help="write results to this baseline file")
+    parser.add_argument("--compare", help="baseline file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed relative regression")
+    args = parser.parse_args(argv)
+
+    names = args.only or list(SCENARIOS)
+    results = {}
+    print(f"{'scenario':<22}{'ticks/s':>12}{'p50 us':>10}{'p99 us':>10}{'peak KiB':>11}")
+    for name in names:
+        result = results[name] = run_scenario(name, args.ticks, args.seed)
+        print(f"{name:<22}{result['ticks_per_sec']:>12.0f}{result['p50_us']:>10.1f}{result['p99_us']:>10.1f}"
+              f"{result['peak_kib']:>11.1f}")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"seed": args.seed, "ticks": args.ticks, "results": results}, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline["results"], args.threshold)
+        for line in regressions:
+            print("REGRESSION", line)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,18 @@
+WINDOW_WIDTH = 700
+WINDOW_HEIGHT = 500
+PADDLE_WIDTH = 100
+PADDLE_HEIGHT = 12
+BALL_RADIUS = 8
+BRICK_ROWS = 5
+BRICK_COLUMNS = 12
+BRICK_WIDTH = (WINDOW_WIDTH - 50) // BRICK_COLUMNS
+BRICK_HEIGHT = 22
+MIN_BRICKS = 25
+TICK_MS = 16
+
+PASTEL_COLORS = ["#FFB6C1", "#A0E7E5", "#B4F8C8", "#FBE7C6", "#FFD6A5", "#FF9CEE", "#C3F584"]
+CHAOS_EVENTS = [
+    "reverse", "multiball", "bigpaddle", "ghostball", "shrinkpad",
+    "invisiblepad", "drunkpad", "partybricks", "confusion",
+    "darkness", "splitpad", "slippery", "gunpad", "shuffler", "flipview"
+]
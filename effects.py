@@ -0,0 +1,170 @@
+from constants import PADDLE_WIDTH, PADDLE_HEIGHT, PASTEL_COLORS
+
+
+class Effect:
+    name = None
+    interval = None
+    excludes = ()
+
+    def apply(self, world):
+        pass
+
+    def tick(self, world):
+        pass
+
+    def revert(self, world):
+        pass
+
+
+class Reverse(Effect):
+    name = "reverse"
+
+
+class Multiball(Effect):
+    name = "multiball"
+
+    def apply(self, world):
+        world.spawn_multiball(world.multiball_count)
+
+
+class BigPaddle(Effect):
+    name = "bigpaddle"
+    excludes = ("shrinkpad",)
+
+    def apply(self, world):
+        world.resize_paddles(140)
+
+    def revert(self, world):
+        world.resize_paddles(PADDLE_WIDTH)
+
+
+class ShrinkPad(BigPaddle):
+    name = "shrinkpad"
+    excludes = ("bigpaddle",)
+
+    def apply(self, world):
+        world.resize_paddles(60)
+
+
+class GhostBall(Effect):
+    name = "ghostball"
+
+    def apply(self, world):
+        world.ball_color = "#cccccc"
+
+    def revert(self, world):
+        world.ball_color = "#ffffff"
+
+
+class InvisiblePad(Effect):
+    name = "invisiblepad"
+    interval = 1000
+
+    def apply(self, world):
+        self.tick(world)
+
+    def tick(self, world):
+        world.paddle_flash = True
+        world.update_paddle_visibility()
+        world.after(200, world.hide_paddle, self.name)
+
+    def revert(self, world):
+        world.paddle_flash = False
+        world.update_paddle_visibility()
+
+
+class DrunkPad(Effect):
+    name = "drunkpad"
+
+    def apply(self, world):
+        world.drunk_direction = world.rng.choice([-1, 1])
+
+    def revert(self, world):
+        world.drunk_direction = 0
+
+
+class PartyBricks(Effect):
+    name = "partybricks"
+    interval = 100
+
+    def apply(self, world):
+        self.tick(world)
+
+    def tick(self, world):
+        for brick in world.bricks:
+            brick.color = world.rng.choice(PASTEL_COLORS)
+        world.emit("bricks_recolored")
+
+
+class Confusion(Effect):
+    name = "confusion"
+
+
+class Darkness(Effect):
+    name = "darkness"
+
+
+class SplitPad(Effect):
+    name = "splitpad"
+
+    def apply(self, world):
+        paddle = world.paddle
+        width = paddle.x2 - paddle.x1
+        y = paddle.y1
+        right = world.board.width - 80
+        world.split_paddles = [
+            world.new_paddle(80 - width // 2, y, 80 + width // 2, y + PADDLE_HEIGHT),
+            world.new_paddle(right - width // 2, y, right + width // 2, y + PADDLE_HEIGHT)
+        ]
+        world.update_paddle_visibility()
+
+    def revert(self, world):
+        world.split_paddles = []
+        world.split_direction = 0
+        world.update_paddle_visibility()
+
+
+class Slippery(Effect):
+    name = "slippery"
+
+    def apply(self, world):
+        world.slippery_velocity = 0
+
+    def revert(self, world):
+        world.slippery_velocity = 0
+
+
+class GunPad(Effect):
+    name = "gunpad"
+    interval = 300
+
+    def apply(self, world):
+        self.tick(world)
+
+    def tick(self, world):
+        world.shoot()
+
+    def revert(self, world):
+        world.gun_bullets = {}
+
+
+class Shuffler(Effect):
+    name = "shuffler"
+
+    def apply(self, world):
+        bricks = list(world.bricks)
+        brick_coords = [b.coords() for b in bricks]
+        world.rng.shuffle(brick_coords)
+        for brick, coords in zip(bricks, brick_coords):
+            world.bricks.move(brick, *coords)
+        world.emit("bricks_moved")
+
+
+class FlipView(Effect):
+    name = "flipview"
+
+
+EFFECTS = {effect.name: effect for effect in (
+    Reverse(), Multiball(), BigPaddle(), GhostBall(), ShrinkPad(), InvisiblePad(), DrunkPad(), PartyBricks(),
+    Confusion(), Darkness(), SplitPad(), Slippery(), GunPad(), Shuffler(), FlipView()
+)}
@@ -0,0 +1,423 @@
+import random
+from collections import namedtuple
+from functools import partial
+
+from balls import BallStore
+from constants import PADDLE_WIDTH, PADDLE_HEIGHT, MIN_BRICKS, TICK_MS, CHAOS_EVENTS
+from effects import EFFECTS
+from grid import BrickGrid
+from levels import ORIGIN_X, ORIGIN_Y, DEFAULT_BOARD, generate_layout, generate_row, layout_bricks, row_bricks
+from scheduler import TimerQueue
+
+Inputs = namedtuple("Inputs", "left right", defaults=(False, False))
+
+SCROLL_SPEED = 8
+
+
+class Rect:
+    __slots__ = ("id", "x1", "y1", "x2", "y2")
+
+    def __init__(self, id, x1, y1, x2, y2):
+        self.id = id
+        self.x1 = x1
+        self.y1 = y1
+        self.x2 = x2
+        self.y2 = y2
+
+    def coords(self):
+        return self.x1, self.y1, self.x2, self.y2
+
+    def set_coords(self, x1, y1, x2, y2):
+        self.x1 = x1
+        self.y1 = y1
+        self.x2 = x2
+        self.y2 = y2
+
+    def move(self, dx, dy):
+        self.x1 += dx
+        self.y1 += dy
+        self.x2 += dx
+        self.y2 += dy
+
+
+class Paddle(Rect):
+    __slots__ = ("hidden",)
+
+    def __init__(self, id, x1, y1, x2, y2):
+        super().__init__(id, x1, y1, x2, y2)
+        self.hidden = False
+
+
+class Brick(Rect):
+    __slots__ = ("color",)
+
+    def __init__(self, id, x1, y1, x2, y2, color):
+        super().__init__(id, x1, y1, x2, y2)
+        self.color = color
+
+
+class Bullet(Rect):
+    __slots__ = ()
+
+
+class World:
+    def __init__(self, seed=None, multiball_count=1, library=None, board=DEFAULT_BOARD, endless=False):
+        self.seed = seed
+        self.library = library
+        self.board = board
+        self.endless = endless
+        self.rng = random.Random(seed)
+        self.next_id = 0
+        self.now = 0
+        self.ticks = 0
+        self.timers = TimerQueue()
+        self.effects = {}
+        self.max_effects = 1
+        self.profiler = None
+
+        self.paddle_speed = 8
+        self.ball_speed = 5
+        self.chaos_chance = 1.0
+        self.multiball_count = multiball_count
+        self.min_bricks = MIN_BRICKS
+        self.chaos_duration = (3000, 10000)
+        self.score = 0
+        self.highscore = 0
+        self.lives = 3
+        self.running = True
+        self.paused = False
+
+        self.drunk_direction = 0
+        self.paddle_flash = False
+        self.split_paddles = []
+        self.split_direction = 0
+        self.slippery_velocity = 0
+        self.gun_bullets = {}
+
+        self.scroll_speed = SCROLL_SPEED
+        self.scroll_remainder = 0.0
+        self.top_row = 0
+        self.bottom_row = 0
+
+        self.events = []
+        self.init_game()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["profiler"] = None
+        state["events"] = []
+        return state
+
+    @property
+    def active_effect(self):
+        return next(reversed(self.effects), None)
+
+    @property
+    def reverse_controls(self):
+        return "reverse" in self.effects
+
+    @property
+    def ghostball(self):
+        return "ghostball" in self.effects
+
+    @property
+    def confusion(self):
+        return "confusion" in self.effects
+
+    @property
+    def darkness(self):
+        return "darkness" in self.effects
+
+    @property
+    def flipped(self):
+        return "flipview" in self.effects
+
+    def new_id(self):
+        self.next_id += 1
+        return self.next_id
+
+    def new_paddle(self, x1, y1, x2, y2):
+        return Paddle(self.new_id(), x1, y1, x2, y2)
+
+    def emit(self, *event):
+        self.events.append(event)
+
+    def drain_events(self):
+        events = self.events
+        self.events = []
+        return events
+
+    def init_game(self):
+        if self.effects:
+            self.clear_chaos()
+        board = self.board
+        self.paddle = self.new_paddle(
+            board.width // 2 - PADDLE_WIDTH // 2,
+            board.height - 40,
+            board.width // 2 + PADDLE_WIDTH // 2,
+            board.height - 40 + PADDLE_HEIGHT
+        )
+        self.balls = BallStore()
+        self.ball_color = "#ffffff"
+        self.ball = self.create_ball(board.width // 2, board.height // 2)
+        self.build_bricks(self.pick_layout())
+        if self.endless:
+            self.scroll_remainder = 0.0
+            self.top_row = 0
+            self.bottom_row = board.rows - 1
+            self.stream_rows()
+        self.emit("level")
+
+    def create_ball(self, x, y, dx=None, dy=None):
+        if dx is None:
+            dx, dy = self.ball_speed, -self.ball_speed
+        return self.balls.add(self.new_id(), x, y, dx, dy)
+
+    def pick_layout(self):
+        library = self.library
+        if library is not None and library.fits(self.board, self.min_bricks):
+            return library[self.rng.randrange(len(library))]
+        return generate_layout(self.rng, self.min_bricks, self.board)
+
+    def build_bricks(self, layout):
+        board = self.board
+        self.bricks = BrickGrid(board.brick_width, board.brick_height, ORIGIN_X, ORIGIN_Y)
+        for x1, y1, x2, y2, color in layout_bricks(layout, board):
+            self.bricks.add(Brick(self.new_id(), x1, y1, x2, y2, color))
+
+    def row_top(self, row):
+        return self.bricks.origin_y + row * self.board.brick_height
+
+    def stream_rows(self):
+        while self.row_top(self.top_row) > 0:
+            self.top_row -= 1
+            mask, colors = generate_row(self.rng, self.board.columns)
+            for x1, y1, x2, y2, color in row_bricks(mask, colors, self.board, self.row_top(self.top_row)):
+                brick = Brick(self.new_id(), x1, y1, x2, y2, color)
+                self.bricks.add(brick)
+                self.emit("brick_added", brick)
+
+    def scroll_bricks(self):
+        self.scroll_remainder += self.scroll_speed * TICK_MS / 1000
+        dy = int(self.scroll_remainder)
+        if not dy:
+            return
+        self.scroll_remainder -= dy
+        self.bricks.scroll(dy)
+        while self.row_top(self.bottom_row) >= self.board.brick_floor:
+            for brick in self.bricks.row(self.bottom_row):
+                self.bricks.remove(brick)
+                self.emit("brick_removed", brick)
+            self.bottom_row -= 1
+        self.stream_rows()
+        self.emit("bricks_moved")
+
+    def set_paddle_speed(self, speed):
+        self.paddle_speed = speed
+
+    def set_ball_speed(self, speed):
+        balls = self.balls
+        if self.ball in balls.ids:
+            i = balls.index(self.ball)
+            balls.dx[i] = speed if balls.dx[i] >= 0 else -speed
+            balls.dy[i] = -speed
+        self.ball_speed = speed
+
+    def set_chaos_chance(self, chance):
+        self.chaos_chance = chance
+
+    def set_mega_chaos(self, enabled):
+        self.max_effects = len(EFFECTS) if enabled else 1
+
+    def toggle_pause(self):
+        if not self.running:
+            return
+        self.paused = not self.paused
+        self.emit("pause", self.paused)
+
+    def restart(self):
+        self.running = True
+        self.paused = False
+        self.lives = 3
+        self.score = 0
+        self.clear_chaos()
+        self.init_game()
+        self.emit("status")
+
+    def step(self, inputs=Inputs()):
+        self.events = []
+        if not self.running or self.paused:
+            return self.events
+        self.now += TICK_MS
+        self.ticks += 1
+
+        prof = self.profiler
+        if prof:
+            prof.enter("paddle")
+        self.move_player(inputs)
+        if prof:
+            prof.exit()
+            prof.enter("bullets")
+        self.update_bullets()
+        if prof:
+            prof.exit()
+            prof.enter("chaos")
+        self.timers.run_due(self.now)
+        if prof:
+            prof.exit()
+        if self.endless:
+            if prof:
+                prof.enter("scroll")
+            self.scroll_bricks()
+            if prof:
+                prof.exit()
+        if prof:
+            prof.enter("balls")
+        missed = self.balls.advance(self)
+        if prof:
+            prof.exit()
+        if self.ball in missed:
+            self.lives -= 1
+            self.emit("life_lost", self.active_effect)
+            self.emit("status")
+            if self.lives <= 0:
+                self.running = False
+                self.emit("game_over")
+                return self.events
+            self.ball = self.create_ball(self.board.width // 2, self.board.height // 2)
+
+        if len(self.bricks) == 0 and not self.endless:
+            self.init_game()
+        return self.events
+
+    def move_player(self, inputs):
+        dx = self.paddle_speed * (inputs.right - inputs.left)
+        if self.reverse_controls:
+            dx = -dx
+        if self.drunk_direction:
+            dx += self.drunk_direction * 2
+
+        if "slippery" in self.effects:
+            idle = 1 - inputs.left - inputs.right
+            if self.drunk_direction or idle <= 0:
+                self.slippery_velocity += dx * 0.1
+            else:
+                self.slippery_velocity = self.slippery_velocity * 0.95 ** idle + dx * 0.1
+            dx = self.slippery_velocity
+        if self.split_paddles:
+            self.split_direction = dx
+            self.move_split_paddles(dx)
+        else:
+            self.move_paddle(dx)
+
+    def move_paddle(self, dx):
+        paddle = self.paddle
+        if paddle.x1 + dx < 0:
+            dx = -paddle.x1
+        elif paddle.x2 + dx > self.board.width:
+            dx = self.board.width - paddle.x2
+        paddle.move(dx, 0)
+
+    def move_split_paddles(self, dx):
+        for i, paddle in enumerate(self.split_paddles):
+            direction = dx if i == 0 else -dx
+            if paddle.x1 + direction < 0:
+                direction = -paddle.x1
+            elif paddle.x2 + direction > self.board.width:
+                direction = self.board.width - paddle.x2
+            paddle.move(direction, 0)
+
+    def hit_brick(self, brick):
+        self.bricks.remove(brick)
+        self.score += 100
+        self.highscore = max(self.highscore, self.score)
+        self.emit("brick_removed", brick)
+        self.emit("status")
+        if self.rng.random() < self.chaos_chance and len(self.effects) < self.max_effects:
+            self.activate_chaos()
+
+    def update_bullets(self):
+        bullets = self.gun_bullets
+        for bullet in list(bullets.values()):
+            bullet.move(0, -10)
+            if bullet.y2 < 0:
+                del bullets[bullet.id]
+                continue
+
+            for brick in self.bricks.query(*bullet.coords()):
+                bullets.pop(bullet.id, None)
+                self.hit_brick(brick)
+                break
+
+    def every(self, interval, callback, effect=None):
+        timer = self.timers.every(self.now, interval, callback)
+        self.effects[effect or self.active_effect].append(timer)
+
+    def after(self, delay, callback, effect=None):
+        timer = self.timers.after(self.now, delay, callback)
+        self.effects[effect or self.active_effect].append(timer)
+
+    def hide_paddle(self):
+        self.paddle_flash = False
+        self.update_paddle_visibility()
+
+    def update_paddle_visibility(self):
+        self.paddle.hidden = bool(self.split_paddles) or ("invisiblepad" in self.effects and not self.paddle_flash)
+
+    def resize_paddles(self, width):
+        for paddle in [self.paddle] + self.split_paddles:
+            center = (paddle.x1 + paddle.x2) / 2
+            paddle.set_coords(center - width // 2, paddle.y1, center + width // 2, paddle.y2)
+
+    def shoot(self):
+        cx = (self.paddle.x1 + self.paddle.x2) / 2
+        y1 = self.paddle.y1
+        bullet = Bullet(self.new_id(), cx - 2, y1 - 10, cx + 2, y1)
+        self.gun_bullets[bullet.id] = bullet
+
+    def activate_chaos(self, effect=None, duration=None):
+        if self.profiler:
+            self.profiler.enter("chaos")
+        if effect is None:
+            effect = self.rng.choice(CHAOS_EVENTS)
+        if duration is None:
+            duration = self.rng.randint(*self.chaos_duration)
+        handler = EFFECTS[effect]
+        for name in (effect,) + handler.excludes:
+            if name in self.effects:
+                self.revert_effect(name)
+
+        self.effects[effect] = [self.timers.after(self.now, duration, partial(self.expire, effect))]
+        handler.apply(self)
+        if handler.interval:
+            self.every(handler.interval, partial(handler.tick, self), effect)
+        if self.profiler:
+            self.profiler.exit()
+        self.emit("chaos", effect)
+
+    def spawn_multiball(self, count):
+        x, y = self.balls.center(self.balls.index(self.ball))
+        speed = self.ball_speed
+        if count == 1:
+            self.create_ball(x, y)
+            return
+        for i in range(count):
+            dx = speed * (2 * i / (count - 1) - 1)
+            self.create_ball(x, y, dx, -speed)
+
+    def revert_effect(self, effect):
+        for timer in self.effects.pop(effect):
+            self.timers.cancel(timer)
+        EFFECTS[effect].revert(self)
+
+    def expire(self, effect):
+        self.revert_effect(effect)
+        self.emit("chaos_cleared", effect)
+
+    def clear_chaos(self):
+        if self.profiler:
+            self.profiler.enter("chaos")
+        for effect in reversed(list(self.effects)):
+            self.expire(effect)
+        if self.profiler:
+            self.profiler.exit()
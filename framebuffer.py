@@ -0,0 +1,202 @@
+import argparse
+import hashlib
+import os
+import struct
+import sys
+import time
+import zlib
+
+import numpy as np
+
+from balls import DIAMETER, BALL_RADIUS
+from bench import scripted_paddle, make_world, force_chaos
+from constants import WINDOW_WIDTH, WINDOW_HEIGHT
+from engine import World, CHAOS_EVENTS, TICK_MS
+from replay import Recording, Player
+
+NAMED_COLORS = {"black": (0, 0, 0), "white": (255, 255, 255), "red": (255, 0, 0)}
+COLOR_CACHE = {}
+BACKGROUND = "#1e1e1e"
+BRICK_OUTLINE = "#444"
+
+
+def rgb(color):
+    value = COLOR_CACHE.get(color)
+    if value is None:
+        if color in NAMED_COLORS:
+            value = NAMED_COLORS[color]
+        elif len(color) == 4:
+            value = tuple(int(c * 2, 16) for c in color[1:])
+        else:
+            value = tuple(int(color[i:i + 2], 16) for i in (1, 3, 5))
+        value = COLOR_CACHE[color] = np.array(value, dtype=np.uint8)
+    return value
+
+
+def ball_mask():
+    centers = np.arange(DIAMETER) + 0.5 - BALL_RADIUS
+    return centers[:, None] ** 2 + centers[None, :] ** 2 <= BALL_RADIUS ** 2
+
+
+def png_bytes(pixels, level=1):
+    height, width, _ = pixels.shape
+    rows = np.zeros((height, width * 3 + 1), dtype=np.uint8)
+    rows[:, 1:] = pixels.reshape(height, width * 3)
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) +
+            chunk(b"IDAT", zlib.compress(rows.tobytes(), level)) + chunk(b"IEND", b""))
+
+
+class FrameBuffer:
+    def __init__(self, width=WINDOW_WIDTH, height=WINDOW_HEIGHT):
+        self.width = width
+        self.height = height
+        self.pixels = np.empty((height, width, 3), dtype=np.uint8)
+        self.frame = self.pixels
+        self.background = np.empty_like(self.pixels)
+        self.background[:] = rgb(BACKGROUND)
+        rows, columns = np.indices((height, width))
+        self.stipple = np.repeat(((rows + columns) % 2).astype(np.uint8)[:, :, None], 3, axis=2)
+        self.mask = ball_mask()
+
+    def rect(self, x1, y1, x2, y2, fill, outline=None):
+        x1, y1 = max(0, round(x1)), max(0, round(y1))
+        x2, y2 = min(self.width, round(x2)), min(self.height, round(y2))
+        if x1 >= x2 or y1 >= y2:
+            return
+        pixels = self.pixels
+        pixels[y1:y2, x1:x2] = rgb(fill)
+        if outline is not None:
+            color = rgb(outline)
+            pixels[y1, x1:x2] = color
+            pixels[y2 - 1, x1:x2] = color
+            pixels[y1:y2, x1] = color
+            pixels[y1:y2, x2 - 1] = color
+
+    def ball(self, x1, y1, fill):
+        x1, y1 = round(x1), round(y1)
+        cx1, cy1 = max(0, x1), max(0, y1)
+        cx2, cy2 = min(self.width, x1 + DIAMETER), min(self.height, y1 + DIAMETER)
+        if cx1 >= cx2 or cy1 >= cy2:
+            return
+        mask = self.mask[cy1 - y1:cy2 - y1, cx1 - x1:cx2 - x1]
+        self.pixels[cy1:cy2, cx1:cx2][mask] = rgb(fill)
+
+    def render(self, world):
+        pixels = self.pixels
+        np.copyto(pixels, self.background)
+        for brick in world.bricks:
+            self.rect(*brick.coords(), brick.color, BRICK_OUTLINE)
+        if not world.paddle.hidden:
+            self.rect(*world.paddle.coords(), "#ffffff")
+        for paddle in world.split_paddles:
+            self.rect(*paddle.coords(), "#fff")
+        for _, x1, y1, _, _ in world.balls.boxes():
+            self.ball(x1, y1, "#ffffff")
+        if world.ball in world.balls.ids:
+            i = world.balls.index(world.ball)
+            self.ball(world.balls.x[i], world.balls.y[i], world.ball_color)
+        for bullet in world.gun_bullets.values():
+            self.rect(*bullet.coords(), "red")
+        frame = self.frame = pixels[::-1] if world.flipped else pixels
+        if world.darkness:
+            np.multiply(frame, self.stipple, out=frame)
+        return frame
+
+    def digest(self):
+        return hashlib.sha256(self.frame.tobytes()).hexdigest()
+
+
+class Capture:
+    def __init__(self, png_dir=None, raw_path=None, png_level=1):
+        self.png_dir = png_dir
+        self.png_level = png_level
+        self.raw = open(raw_path, "wb") if raw_path else None
+        self.frames = 0
+        if png_dir:
+            os.makedirs(png_dir, exist_ok=True)
+
+    def write(self, pixels):
+        if self.png_dir:
+            with open(os.path.join(self.png_dir, f"frame{self.frames:06d}.png"), "wb") as f:
+                f.write(png_bytes(pixels, self.png_level))
+        if self.raw:
+            self.raw.write(pixels.tobytes())
+        self.frames += 1
+
+    def close(self):
+        if self.raw:
+            self.raw.close()
+
+
+def effect_digests(seed, ticks):
+    framebuffer = FrameBuffer()
+    digests = {}
+    for effect in CHAOS_EVENTS:
+        world = make_world(seed)
+        force_chaos(world, effect)
+        for _ in range(ticks):
+            world.step(scripted_paddle(world))
+        framebuffer.render(world)
+        digests[effect] = framebuffer.digest()
+    return digests
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render ChaosBreakout frames headless into a NumPy framebuffer")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ticks", type=int, default=600)
+    parser.add_argument("--effect", choices=CHAOS_EVENTS, help="keep this chaos event active for the whole run")
+    parser.add_argument("--replay", metavar="PATH", help="render a recorded session instead of the scripted paddle")
+    parser.add_argument("--every", type=int, default=1, help="capture one frame every N ticks")
+    parser.add_argument("--png-dir", help="write numbered PNG frames here")
+    parser.add_argument("--png-level", type=int, default=1, help="zlib level for PNG frames")
+    parser.add_argument("--raw", metavar="PATH", help="append frames as raw rgb24 video")
+    parser.add_argument("--digests", action="store_true",
+                        help="print a frame hash for every chaos event after --ticks ticks")
+    args = parser.parse_args(argv)
+
+    if args.digests:
+        for effect, digest in effect_digests(args.seed, args.ticks).items():
+            print(f"{effect:<14}{digest}")
+        return 0
+
+    player = None
+    if args.replay:
+        player = Player(Recording.load(args.replay))
+        world = player.world
+    else:
+        world = World(args.seed)
+        if args.effect:
+            world.chaos_chance = 0
+            force_chaos(world, args.effect)
+
+    framebuffer = FrameBuffer(world.board.width, world.board.height)
+    capture = Capture(args.png_dir, args.raw, args.png_level)
+    start = time.perf_counter()
+    for tick in range(args.ticks):
+        if player:
+            world = player.run_until(tick + 1)
+        else:
+            world.step(scripted_paddle(world))
+        if not world.running:
+            break
+        if tick % args.every == 0:
+            capture.write(framebuffer.render(world))
+    capture.close()
+    elapsed = time.perf_counter() - start
+    rate = capture.frames / elapsed if elapsed else 0
+    print(f"{capture.frames} frames in {elapsed:.2f}s ({rate:.0f} frames/s)")
+    if args.raw:
+        fps = 1000 / (TICK_MS * args.every)
+        size = f"{framebuffer.width}x{framebuffer.height}"
+        print(f"ffmpeg -f rawvideo -pix_fmt rgb24 -s {size} -r {fps:g} -i {args.raw} out.mp4")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
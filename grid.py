@@ -0,0 +1,114 @@
+from math import floor
+
+
+class BrickGrid:
+    def __init__(self, cell_width, cell_height, origin_x=0, origin_y=0):
+        self.cell_width = cell_width
+        self.cell_height = cell_height
+        self.origin_x = origin_x
+        self.origin_y = origin_y
+        self.bricks = {}
+        self.cells = {}
+        self.brick_cells = {}
+        self.cached_bounds = None
+        self.cached_occupancy = None
+
+    def __len__(self):
+        return len(self.bricks)
+
+    def __iter__(self):
+        return iter(self.bricks.values())
+
+    def cell_range(self, x1, y1, x2, y2):
+        col1 = floor((x1 - self.origin_x) / self.cell_width)
+        col2 = floor((x2 - self.origin_x) / self.cell_width)
+        row1 = floor((y1 - self.origin_y) / self.cell_height)
+        row2 = floor((y2 - self.origin_y) / self.cell_height)
+        return [(col, row) for row in range(row1, row2 + 1) for col in range(col1, col2 + 1)]
+
+    def add(self, brick):
+        self.bricks[brick.id] = brick
+        self.link(brick)
+
+    def remove(self, brick):
+        del self.bricks[brick.id]
+        self.unlink(brick)
+
+    def move(self, brick, x1, y1, x2, y2):
+        self.unlink(brick)
+        brick.set_coords(x1, y1, x2, y2)
+        self.link(brick)
+
+    def link(self, brick):
+        keys = self.cell_range(brick.x1, brick.y1, brick.x2, brick.y2)
+        for key in keys:
+            cell = self.cells.get(key)
+            if cell is None:
+                cell = self.cells[key] = {}
+            cell[brick.id] = brick
+        self.brick_cells[brick.id] = keys
+        self.cached_bounds = None
+        self.cached_occupancy = None
+
+    def unlink(self, brick):
+        for key in self.brick_cells.pop(brick.id):
+            cell = self.cells[key]
+            del cell[brick.id]
+            if not cell:
+                del self.cells[key]
+        self.cached_bounds = None
+        self.cached_occupancy = None
+
+    def scroll(self, dy):
+        self.origin_y += dy
+        for brick in self.bricks.values():
+            brick.y1 += dy
+            brick.y2 += dy
+        if self.cached_bounds:
+            x1, y1, x2, y2 = self.cached_bounds
+            self.cached_bounds = (x1, y1 + dy, x2, y2 + dy)
+
+    def row(self, row):
+        return [brick for (_, cell_row), cell in self.cells.items() if cell_row == row for brick in cell.values()]
+
+    def bounds(self):
+        if self.cached_bounds is None and self.cells:
+            cols = [col for col, _ in self.cells]
+            rows = [row for _, row in self.cells]
+            self.cached_bounds = (
+                self.origin_x + min(cols) * self.cell_width,
+                self.origin_y + min(rows) * self.cell_height,
+                self.origin_x + (max(cols) + 1) * self.cell_width,
+                self.origin_y + (max(rows) + 1) * self.cell_height
+            )
+        return self.cached_bounds
+
+    def occupancy(self):
+        if self.cached_occupancy is None and self.cells:
+            cols = [col for col, _ in self.cells]
+            rows = [row for _, row in self.cells]
+            col0, row0 = min(cols), min(rows)
+            width, height = max(cols) - col0 + 1, max(rows) - row0 + 1
+            table = [[0] * (width + 1)]
+            for row in range(row0, row0 + height):
+                above = table[-1]
+                counts = [0]
+                filled = 0
+                for i, col in enumerate(range(col0, col0 + width), 1):
+                    filled += (col, row) in self.cells
+                    counts.append(above[i] + filled)
+                table.append(counts)
+            self.cached_occupancy = (col0, row0, table)
+        return self.cached_occupancy
+
+    def query(self, x1, y1, x2, y2):
+        found = {}
+        cells = self.cells
+        for key in self.cell_range(x1, y1, x2, y2):
+            cell = cells.get(key)
+            if cell:
+                found.update(cell)
+        if not found:
+            return []
+        return [brick for _, brick in sorted(found.items())
+                if x2 >= brick.x1 and x1 <= brick.x2 and y2 >= brick.y1 and y1 <= brick.y2]
@@ -0,0 +1,178 @@
+import argparse
+import mmap
+import random
+import struct
+import sys
+from collections import namedtuple
+
+from constants import (
+    WINDOW_WIDTH, WINDOW_HEIGHT, PADDLE_WIDTH, BRICK_ROWS, BRICK_COLUMNS, BRICK_HEIGHT, MIN_BRICKS, PASTEL_COLORS
+)
+
+ORIGIN_X = 25
+ORIGIN_Y = 60
+MIN_BRICK_WIDTH = 12
+CELLS = BRICK_ROWS * BRICK_COLUMNS
+
+MAGIC = b"CBLL"
+VERSION = 2
+HEADER = struct.Struct("<4sBBBHI")
+
+Layout = namedtuple("Layout", "mask colors")
+
+
+class Board(namedtuple("Board", "width height rows columns",
+                       defaults=(WINDOW_WIDTH, WINDOW_HEIGHT, BRICK_ROWS, BRICK_COLUMNS))):
+    __slots__ = ()
+
+    @property
+    def cells(self):
+        return self.rows * self.columns
+
+    @property
+    def brick_width(self):
+        return (self.width - 2 * ORIGIN_X) // self.columns
+
+    @property
+    def brick_height(self):
+        return BRICK_HEIGHT
+
+    @property
+    def brick_floor(self):
+        return self.height // 2 - 2 * BRICK_HEIGHT
+
+    def validate(self):
+        if self.width < PADDLE_WIDTH:
+            raise ValueError(f"board must be at least {PADDLE_WIDTH} pixels wide for the paddle")
+        if self.brick_width < MIN_BRICK_WIDTH:
+            raise ValueError(f"{self.columns} columns leave bricks narrower than {MIN_BRICK_WIDTH} pixels "
+                             f"on a {self.width} pixel wide board")
+        if ORIGIN_Y + self.rows * self.brick_height > self.brick_floor:
+            raise ValueError(f"{self.rows} brick rows reach past the brick floor at y={self.brick_floor} "
+                             f"on a {self.height} pixel high board")
+        return self
+
+
+DEFAULT_BOARD = Board()
+
+
+def record_struct(rows, columns):
+    cells = rows * columns
+    return struct.Struct(f"<{(cells + 7) // 8}s{(cells + 1) // 2}s")
+
+
+def generate_row(rng, columns=BRICK_COLUMNS):
+    half = [rng.choice([True, False]) for _ in range(columns // 2)]
+    mask = 0
+    colors = bytearray(columns)
+    for col, active in enumerate(half + half[::-1]):
+        if active:
+            mask |= 1 << col
+            colors[col] = rng.randrange(len(PASTEL_COLORS))
+    return mask, bytes(colors)
+
+
+def generate_layout(rng, min_bricks=MIN_BRICKS, board=DEFAULT_BOARD):
+    attempts = 0
+    while True:
+        mask = 0
+        colors = bytearray()
+        for row in range(board.rows):
+            row_mask, row_colors = generate_row(rng, board.columns)
+            mask |= row_mask << row * board.columns
+            colors += row_colors
+        if bin(mask).count("1") >= min_bricks or attempts > 5:
+            return Layout(mask, bytes(colors))
+        attempts += 1
+
+
+def row_bricks(mask, colors, board, y1, first=0):
+    width = board.brick_width
+    for col in range(board.columns):
+        if mask >> first + col & 1:
+            x1 = ORIGIN_X + col * width
+            yield x1, y1, x1 + width - 4, y1 + board.brick_height - 4, PASTEL_COLORS[colors[first + col]]
+
+
+def layout_bricks(layout, board=DEFAULT_BOARD):
+    mask, colors = layout
+    for row in range(board.rows):
+        yield from row_bricks(mask, colors, board, ORIGIN_Y + row * board.brick_height, row * board.columns)
+
+
+def pack_colors(colors):
+    padded = colors + bytes(len(colors) % 2)
+    return bytes(padded[i] | padded[i + 1] << 4 for i in range(0, len(padded), 2))
+
+
+def unpack_colors(packed, cells=CELLS):
+    colors = bytearray(len(packed) * 2)
+    colors[0::2] = bytes(b & 0x0F for b in packed)
+    colors[1::2] = bytes(b >> 4 for b in packed)
+    return bytes(colors[:cells])
+
+
+class LayoutLibrary:
+    def __init__(self, path):
+        self.path = path
+        self.open()
+
+    def __getstate__(self):
+        return {"path": self.path}
+
+    def __setstate__(self, state):
+        self.path = state["path"]
+        self.open()
+
+    def open(self):
+        with open(self.path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.rows, self.columns, self.min_bricks, self.count = HEADER.unpack_from(self.data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{self.path} is not a ChaosBreakout layout library")
+        self.record = record_struct(self.rows, self.columns)
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        mask, packed = self.record.unpack_from(self.data, HEADER.size + index * self.record.size)
+        return Layout(int.from_bytes(mask, "little"), unpack_colors(packed, self.rows * self.columns))
+
+    def fits(self, board, min_bricks):
+        return (self.rows, self.columns, self.min_bricks) == (board.rows, board.columns, min_bricks)
+
+
+def build_library(path, count, min_bricks=MIN_BRICKS, board=DEFAULT_BOARD):
+    record = record_struct(board.rows, board.columns)
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, board.rows, board.columns, min_bricks, count))
+        for seed in range(count):
+            mask, colors = generate_layout(random.Random(seed), min_bricks, board)
+            f.write(record.pack(mask.to_bytes((board.cells + 7) // 8, "little"), pack_colors(colors)))
+    return record.size
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a ChaosBreakout layout library; entry N is the layout of seed N")
+    parser.add_argument("path")
+    parser.add_argument("--count", type=int, default=4096)
+    parser.add_argument("--min-bricks", type=int, default=MIN_BRICKS)
+    parser.add_argument("--rows", type=int, default=BRICK_ROWS)
+    parser.add_argument("--columns", type=int, default=BRICK_COLUMNS)
+    args = parser.parse_args(argv)
+
+    board = Board(rows=args.rows, columns=args.columns)
+    try:
+        board.validate()
+    except ValueError as error:
+        parser.error(str(error))
+    size = build_library(args.path, args.count, args.min_bricks, board)
+    print(f"{args.count} layouts ({size} bytes each) written to {args.path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,573 +1,567 @@
-import tkinter as tk
-import random
-import time
-
-WINDOW_WIDTH = 700
-WINDOW_HEIGHT = 500
-PADDLE_WIDTH = 100
-PADDLE_HEIGHT = 12
-BALL_RADIUS = 8
-BRICK_ROWS = 5
-BRICK_COLUMNS = 12
-BRICK_WIDTH = (WINDOW_WIDTH - 50) // BRICK_COLUMNS
-BRICK_HEIGHT = 22
-MIN_BRICKS = 25
-
-PASTEL_COLORS = ["#FFB6C1", "#A0E7E5", "#B4F8C8", "#FBE7C6", "#FFD6A5", "#FF9CEE", "#C3F584"]
-CHAOS_EVENTS = [
-    "reverse", "multiball", "bigpaddle", "ghostball", "shrinkpad",
-    "invisiblepad", "drunkpad", "partybricks", "confusion",
-    "darkness", "splitpad", "slippery", "gunpad", "shuffler", "flipview"
-]
-
-CHAOS_COLORS = {
-    "reverse": "#f72585",
-    "multiball": "#4361ee",
-    "bigpaddle": "#80ed99",
-    "ghostball": "#adb5bd",
-    "shrinkpad": "#ff6b6b",
-    "invisiblepad": "#222222",
-    "drunkpad": "#e29578",
-    "partybricks": "#ffbe0b",
-    "confusion": "#9d4edd",
-    "darkness": "#000000",
-    "splitpad": "#e0aaff",
-    "slippery": "#72efdd",
-    "gunpad": "#d00000",
-    "shuffler": "#ffb703",
-    "flipview": "#9ae3d3"
-}
-
-
-class ChaosBreakout:
-    def __init__(self, root):
-        self.root = root
-        self.canvas = tk.Canvas(root, width=WINDOW_WIDTH, height=WINDOW_HEIGHT, bg="#1e1e1e", highlightthickness=0)
-        self.canvas.grid(row=0, column=1, rowspan=3)
-
-        self.reverse_controls = False
-        self.extra_balls = []
-        self.effect_end_time = None
-        self.active_effect = None
-        self.ghostball = False
-        self.shrunk = False
-        self.invisiblepad = False
-        self.drunk_direction = None
-        self.partybricks_active = False
-        self.confusion = False
-        self.dark_overlay = None
-        self.split_paddles = []
-        self.split_direction = 0
-        self.slippery_velocity = 0
-        self.gun_bullets = []
-        self.bullets_to_remove = set()
-        self.flip_applied = False
-        self.paddle_speed = 8
-        self.ball_speed = 5
-        self.chaos_chance = 1.0
-        self.score = 0
-        self.highscore = 0
-        self.lives = 3
-        self.running = True
-        self.paused = False
-
-        self.left_pressed = False
-        self.right_pressed = False
-
-        self.build_sidebar()
-        self.init_game()
-        self.bind_keys()
-        self.loop_movement()
-        self.game_loop()
-
-    def build_sidebar(self):
-        self.sidebar = tk.Frame(self.root, width=260, height=WINDOW_HEIGHT, bg="#f3ede5")
-        self.sidebar.grid(row=0, column=0, sticky="ns")
-        self.sidebar.grid_propagate(False)
-
-        title = tk.Label(self.sidebar, text="ChaosBreakout", font=("Segoe UI", 17, "bold"), bg="#f3ede5", fg="#3a0ca3")
-        title.pack(pady=(10, 4))
-
-        self.score_label = tk.Label(self.sidebar, text="Score: 0", font=("Segoe UI", 11, "bold"), bg="#f3ede5",
-                                    fg="#222")
-        self.score_label.pack()
-
-        self.highscore_label = tk.Label(self.sidebar, text="High Score: 0", font=("Segoe UI", 10), bg="#f3ede5",
-                                        fg="#777")
-        self.highscore_label.pack()
-
-        self.lives_label = tk.Label(self.sidebar, text="❤ x3", font=("Segoe UI", 11), bg="#f3ede5", fg="#e63946")
-        self.lives_label.pack(pady=(0, 10))
-
-        tk.Label(self.sidebar, text="Chaos Event", font=("Segoe UI", 11, "underline"), bg="#f3ede5", fg="#444").pack()
-
-        self.chaos_label = tk.Label(
-            self.sidebar, text="None", font=("Segoe UI", 10, "bold"),
-            fg="#d00000", bg="#fffdf5", width=25, height=2, relief="ridge", bd=2
-        )
-        self.chaos_label.pack(pady=(2, 12), padx=10)
-
-        tk.Label(self.sidebar, text="Settings", font=("Segoe UI", 11, "underline"), bg="#f3ede5", fg="#444").pack()
-
-        for text, varname, from_, to, update_fn in [
-            ("Paddle Speed", "speed_slider", 3, 15, self.update_speed),
-            ("Ball Speed", "ball_slider", 2, 10, self.update_ball_speed),
-            ("Chaos Chance", "chaos_slider", 0, 100, self.update_chaos)
-        ]:
-            tk.Label(self.sidebar, text=text, font=("Segoe UI", 10), bg="#f3ede5").pack()
-            slider = tk.Scale(self.sidebar, from_=from_, to=to, orient="horizontal",
-                              command=update_fn, bg="#f3ede5", length=200)
-            if varname == "chaos_slider":
-                slider.set(100)
-            else:
-                slider.set(getattr(self, text.lower().replace(" ", "_")))
-
-            slider.pack(pady=(0, 6))
-            setattr(self, varname, slider)
-
-        self.chaos_value_label = tk.Label(self.sidebar, text=f"{int(self.chaos_chance * 100)}%",
-                                          font=("Segoe UI", 10, "italic"), bg="#f3ede5", fg="#555")
-        self.chaos_value_label.pack(pady=(0, 10))
-
-        self.restart_btn = tk.Button(self.sidebar, text="Restart Game", font=("Segoe UI", 10, "bold"),
-                                     command=self.restart_game, bg="#d8f3dc", fg="#000",
-                                     activebackground="#b7e4c7")
-        self.restart_btn.pack(pady=(6, 8))
-
-    def update_speed(self, val):
-        self.paddle_speed = int(val)
-
-    def update_ball_speed(self, val):
-        speed = int(val)
-        self.ball_dx = speed if self.ball_dx >= 0 else -speed
-        self.ball_dy = -speed
-        self.ball_speed = speed
-
-    def update_chaos(self, val):
-        self.chaos_chance = int(val) / 100
-        self.chaos_value_label.config(text=f"{int(val)}%")
-
-    def init_game(self):
-        self.canvas.delete("all")
-
-        self.pause_tip = self.canvas.create_text(
-            WINDOW_WIDTH // 2, 12,
-            text="Press SPACE to pause",
-            font=("Segoe UI", 10, "italic"),
-            fill="#888888"
-        )
-
-        self.paddle = self.canvas.create_rectangle(
-            WINDOW_WIDTH // 2 - PADDLE_WIDTH // 2,
-            WINDOW_HEIGHT - 40,
-            WINDOW_WIDTH // 2 + PADDLE_WIDTH // 2,
-            WINDOW_HEIGHT - 40 + PADDLE_HEIGHT,
-            fill="#ffffff", outline="", width=0
-        )
-        self.ball = self.create_ball(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2)
-
-        self.ball_dx = self.ball_speed
-        self.ball_dy = -self.ball_speed
-
-        self.extra_balls = []
-        self.effect_end_time = None
-        self.active_effect = None
-        self.reverse_controls = False
-        self.ghostball = False
-        self.shrunk = False
-        self.pause_overlay = None
-        self.pause_text = None
-
-        self.generate_symmetric_bricks()
-
-    def create_ball(self, x, y):
-        return self.canvas.create_oval(
-            x - BALL_RADIUS, y - BALL_RADIUS,
-            x + BALL_RADIUS, y + BALL_RADIUS,
-            fill="#ffffff", outline="", width=0
-        )
-
-    def generate_symmetric_bricks(self):
-        self.bricks = []
-        attempts = 0
-        while True:
-            self.bricks.clear()
-            half_cols = BRICK_COLUMNS // 2
-            for row in range(BRICK_ROWS):
-                pattern = [random.choice([True, False]) for _ in range(half_cols)]
-                full_pattern = pattern + pattern[::-1]
-                for col, active in enumerate(full_pattern):
-                    if active:
-                        x1 = 25 + col * BRICK_WIDTH
-                        y1 = 60 + row * BRICK_HEIGHT
-                        x2 = x1 + BRICK_WIDTH - 4
-                        y2 = y1 + BRICK_HEIGHT - 4
-                        color = random.choice(PASTEL_COLORS)
-                        self.bricks.append(self.canvas.create_rectangle(
-                            x1, y1, x2, y2, fill=color, outline="#444", width=1
-                        ))
-            if len(self.bricks) >= MIN_BRICKS or attempts > 5:
-                break
-            attempts += 1
-
-    def bind_keys(self):
-        self.canvas.focus_set()
-        self.canvas.bind("<KeyPress-Left>", lambda e: self.set_key("left", True))
-        self.canvas.bind("<KeyRelease-Left>", lambda e: self.set_key("left", False))
-        self.canvas.bind("<KeyPress-Right>", lambda e: self.set_key("right", True))
-        self.canvas.bind("<KeyRelease-Right>", lambda e: self.set_key("right", False))
-        self.canvas.bind("<space>", self.toggle_pause)
-
-    def toggle_pause(self, event=None):
-        if not self.running:
-            return
-        self.paused = not self.paused
-        if self.paused:
-            self.pause_overlay = self.canvas.create_rectangle(0, 0, WINDOW_WIDTH, WINDOW_HEIGHT,
-                                                              fill="black", stipple="gray50")
-            self.pause_text = self.canvas.create_text(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2,
-                                                      text="PAUSED", fill="#ffffff",
-                                                      font=("Segoe UI", 24, "bold"))
-        else:
-            self.canvas.delete(self.pause_overlay)
-            self.canvas.delete(self.pause_text)
-            self.game_loop()
-
-    def set_key(self, key, value):
-        if key == "left":
-            self.left_pressed = value
-        elif key == "right":
-            self.right_pressed = value
-
-    def loop_movement(self):
-        if not self.paused:
-            dx = self.paddle_speed if self.right_pressed else -self.paddle_speed if self.left_pressed else 0
-            if self.reverse_controls:
-                dx = -dx
-            if self.drunk_direction:
-                dx += self.drunk_direction * 2
-
-            if self.active_effect == "slippery":
-                if dx == 0:
-                    self.slippery_velocity *= 0.95
-                else:
-                    self.slippery_velocity += dx * 0.1
-                self.move_paddle(self.slippery_velocity)
-            elif self.active_effect == "splitpad":
-                self.split_direction = dx
-                self.move_split_paddles(dx)
-            else:
-                self.move_paddle(dx)
-        self.update_bullets()
-        self.root.after(16, self.loop_movement)
-
-    def move_paddle(self, dx):
-        x1, _, x2, _ = self.canvas.coords(self.paddle)
-        if x1 + dx < 0:
-            dx = -x1
-        elif x2 + dx > WINDOW_WIDTH:
-            dx = WINDOW_WIDTH - x2
-        self.canvas.move(self.paddle, dx, 0)
-
-    def check_collisions(self, ball_id):
-        x1, y1, x2, y2 = self.canvas.coords(ball_id)
-        if x1 <= 0 or x2 >= WINDOW_WIDTH:
-            return "x"
-
-        if not self.flip_applied and y1 <= 0:
-            return "y"
-        if self.flip_applied and y2 >= WINDOW_HEIGHT:
-            return "y"
-
-        if (not self.flip_applied and y2 >= WINDOW_HEIGHT) or (self.flip_applied and y1 <= 0):
-            self.canvas.delete(ball_id)
-            return "miss"
-
-        if self.active_effect == "splitpad":
-            for paddle in self.split_paddles:
-                px1, py1, px2, py2 = self.canvas.coords(paddle)
-                if y2 >= py1 and y1 <= py2 and x2 >= px1 and x1 <= px2:
-                    return "y"
-
-        px1, py1, px2, py2 = self.canvas.coords(self.paddle)
-        if y2 >= py1 and y1 <= py2 and x2 >= px1 and x1 <= px2:
-            return "y"
-
-        if not self.ghostball:
-            for brick in list(self.bricks):
-                if brick not in self.canvas.find_all():
-                    continue
-                bx1, by1, bx2, by2 = self.canvas.coords(brick)
-                if x2 >= bx1 and x1 <= bx2 and y2 >= by1 and y1 <= by2:
-                    self.canvas.delete(brick)
-                    self.bricks.remove(brick)
-                    self.score += 100
-                    self.update_status()
-                    if random.random() < self.chaos_chance and not self.active_effect:
-                        self.activate_chaos()
-                    overlap_x = min(x2, bx2) - max(x1, bx1)
-                    overlap_y = min(y2, by2) - max(y1, by1)
-                    if overlap_x > overlap_y:
-                        return "y"
-                    else:
-                        return "x"
-        return None
-
-    def activate_chaos(self):
-        effect = random.choice(CHAOS_EVENTS)
-        self.active_effect = effect
-        self.effect_end_time = int(time.time() * 1000) + random.randint(3000, 10000)
-        self.chaos_label.config(text=f"{effect.upper()}!", fg="#fff", bg=CHAOS_COLORS.get(effect, "#222"))
-
-        if effect == "reverse":
-            self.reverse_controls = True
-        elif effect == "multiball":
-            x1, y1, x2, y2 = self.canvas.coords(self.ball)
-            x = (x1 + x2) / 2
-            y = (y1 + y2) / 2
-            new_ball = self.create_ball(x, y)
-            speed = self.ball_speed
-            self.extra_balls.append((new_ball, speed, -speed))
-        elif effect == "bigpaddle":
-            px1, py1, px2, py2 = self.canvas.coords(self.paddle)
-            center = (px1 + px2) / 2
-            self.canvas.coords(self.paddle, center - 70, py1, center + 70, py2)
-        elif effect == "ghostball":
-            self.ghostball = True
-            self.canvas.itemconfig(self.ball, fill="#cccccc")
-        elif effect == "shrinkpad":
-            if not self.shrunk:
-                px1, py1, px2, py2 = self.canvas.coords(self.paddle)
-                center = (px1 + px2) / 2
-                self.canvas.coords(self.paddle, center - 30, py1, center + 30, py2)
-                self.shrunk = True
-        elif effect == "invisiblepad":
-            self.canvas.itemconfig(self.paddle, state="hidden")
-            self.invisiblepad = True
-            self.flicker_paddle()
-        elif effect == "drunkpad":
-            self.drunk_direction = random.choice([-1, 1])
-        elif effect == "partybricks":
-            self.partybricks_active = True
-            self.partybricks()
-        elif effect == "confusion":
-            self.confusion = True
-        elif effect == "darkness":
-            self.dark_overlay = self.canvas.create_rectangle(0, 0, WINDOW_WIDTH, WINDOW_HEIGHT,
-                                                             fill="black", stipple="gray50", tags="dark")
-        elif effect == "splitpad":
-            self.canvas.itemconfig(self.paddle, state="hidden")
-            px1, py1, px2, py2 = self.canvas.coords(self.paddle)
-            width = px2 - px1
-            y = py1
-            self.split_paddles = [
-                self.canvas.create_rectangle(80 - width // 2, y, 80 + width // 2, y + PADDLE_HEIGHT, fill="#fff",
-                                             outline=""),
-                self.canvas.create_rectangle(WINDOW_WIDTH - 80 - width // 2, y, WINDOW_WIDTH - 80 + width // 2,
-                                             y + PADDLE_HEIGHT, fill="#fff", outline="")
-            ]
-        elif effect == "slippery":
-            self.slippery_velocity = 0
-        elif effect == "gunpad":
-            def shoot():
-                if self.active_effect != "gunpad":
-                    return
-                x1, y1, x2, y2 = self.canvas.coords(self.paddle)
-                cx = (x1 + x2) / 2
-                bullet = self.canvas.create_rectangle(cx - 2, y1 - 10, cx + 2, y1, fill="red")
-                self.gun_bullets.append(bullet)
-                self.root.after(300, shoot)
-
-            shoot()
-        elif effect == "shuffler":
-            brick_coords = [self.canvas.coords(b) for b in self.bricks]
-            random.shuffle(brick_coords)
-            for i, b in enumerate(self.bricks):
-                self.canvas.coords(b, *brick_coords[i])
-        elif effect == "flipview":
-            if not self.flip_applied:
-                self.canvas.scale("all", WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2, 1, -1)
-                self.flip_applied = True
-
-    def clear_chaos(self):
-        self.reverse_controls = False
-        self.ghostball = False
-        self.canvas.itemconfig(self.ball, fill="#ffffff")
-        if self.active_effect in ["bigpaddle", "shrinkpad"]:
-            px1, py1, px2, py2 = self.canvas.coords(self.paddle)
-            center = (px1 + px2) / 2
-            self.canvas.coords(self.paddle, center - PADDLE_WIDTH // 2, py1, center + PADDLE_WIDTH // 2, py2)
-        if self.invisiblepad:
-            self.canvas.itemconfig(self.paddle, state="normal")
-            self.invisiblepad = False
-        if self.drunk_direction is not None:
-            self.drunk_direction = None
-        if self.partybricks_active:
-            self.partybricks_active = False
-        if self.confusion:
-            self.confusion = False
-        self.active_effect = None
-        self.shrunk = False
-        self.effect_end_time = None
-        self.chaos_label.config(text="None", fg="#d00000", bg="#fffdf5")
-        if self.dark_overlay:
-            self.canvas.delete(self.dark_overlay)
-            self.dark_overlay = None
-        if self.split_paddles:
-            for p in self.split_paddles:
-                self.canvas.delete(p)
-            self.canvas.itemconfig(self.paddle, state="normal")
-            self.split_paddles = []
-        self.slippery_velocity = 0
-        for bullet in self.gun_bullets:
-            self.canvas.delete(bullet)
-        self.gun_bullets = []
-        self.bullets_to_remove.clear()
-        if self.flip_applied:
-            self.canvas.scale("all", WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2, 1, -1)
-            self.flip_applied = False
-
-    def partybricks(self):
-        if not self.partybricks_active:
-            return
-        for brick in self.bricks:
-            color = random.choice(PASTEL_COLORS)
-            self.canvas.itemconfig(brick, fill=color)
-        self.root.after(100, self.partybricks)
-
-    def update_bullets(self):
-        bullets_to_remove = set()
-
-        for bullet in self.gun_bullets:
-            if bullet in self.bullets_to_remove:
-                continue
-
-            self.canvas.move(bullet, 0, -10)
-            coords = self.canvas.coords(bullet)
-            if len(coords) != 4:
-                bullets_to_remove.add(bullet)
-                continue
-
-            x1, y1, x2, y2 = coords
-            if y2 < 0:
-                bullets_to_remove.add(bullet)
-                continue
-
-            hit = False
-            for brick in list(self.bricks):
-                if brick not in self.canvas.find_all():
-                    continue
-                bx1, by1, bx2, by2 = self.canvas.coords(brick)
-                if x2 >= bx1 and x1 <= bx2 and y2 >= by1 and y1 <= by2:
-                    self.canvas.delete(brick)
-                    self.bricks.remove(brick)
-                    self.score += 100
-                    self.update_status()
-                    bullets_to_remove.add(bullet)
-                    hit = True
-                    if random.random() < self.chaos_chance and not self.active_effect:
-                        self.activate_chaos()
-                    break
-
-        for bullet in bullets_to_remove:
-            if bullet in self.gun_bullets:
-                self.canvas.delete(bullet)
-                self.gun_bullets.remove(bullet)
-
-    def move_split_paddles(self, dx):
-        for i, paddle in enumerate(self.split_paddles):
-            direction = dx if i == 0 else -dx
-            x1, _, x2, _ = self.canvas.coords(paddle)
-            if x1 + direction < 0:
-                direction = -x1
-            elif x2 + direction > WINDOW_WIDTH:
-                direction = WINDOW_WIDTH - x2
-            self.canvas.move(paddle, direction, 0)
-
-    def flicker_paddle(self):
-        if not self.invisiblepad:
-            return
-        self.canvas.itemconfig(self.paddle, state="normal")
-        self.root.after(200, lambda: self.canvas.itemconfig(self.paddle, state="hidden"))
-        self.root.after(1000, self.flicker_paddle)
-
-    def move_ball(self, ball_id, dx, dy):
-        if self.confusion:
-            dx += random.choice([-1, 0, 1])
-            dy += random.choice([-1, 0, 1])
-        result = self.check_collisions(ball_id)
-        if result == "x":
-            dx = -dx
-        elif result == "y":
-            dy = -dy
-        elif result == "miss":
-            return None, None
-        self.canvas.move(ball_id, dx, dy)
-        return dx, dy
-
-    def update_status(self):
-        self.score_label.config(text=f"Score: {self.score}")
-        self.highscore = max(self.highscore, self.score)
-        self.highscore_label.config(text=f"High Score: {self.highscore}")
-        self.lives_label.config(text=f"❤ x{self.lives}")
-
-    def game_loop(self):
-        if not self.running or self.paused:
-            return
-
-        result = self.move_ball(self.ball, self.ball_dx, self.ball_dy)
-        if result != (None, None):
-            self.ball_dx, self.ball_dy = result
-        else:
-            self.lives -= 1
-            self.update_status()
-            if self.lives <= 0:
-                self.chaos_label.config(text="💀 GAME OVER", fg="white", bg="red")
-                self.running = False
-                return
-            self.ball = self.create_ball(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2)
-            self.ball_dx = self.ball_speed
-            self.ball_dy = -self.ball_speed
-
-        still_alive = []
-        for ball_id, dx, dy in self.extra_balls:
-            res = self.move_ball(ball_id, dx, dy)
-            if res != (None, None):
-                still_alive.append((ball_id, *res))
-        self.extra_balls = still_alive
-
-        if self.active_effect and int(time.time() * 1000) >= self.effect_end_time:
-            self.clear_chaos()
-
-        if len(self.bricks) == 0:
-            self.init_game()
-
-        self.root.after(16, self.game_loop)
-
-    def restart_game(self):
-        self.running = True
-        self.lives = 3
-        self.score = 0
-        self.update_status()
-        self.clear_chaos()
-
-        for ball_id, *_ in self.extra_balls:
-            self.canvas.delete(ball_id)
-        self.extra_balls.clear()
-
-        self.ball_dx = self.ball_speed
-        self.ball_dy = -self.ball_speed
-
-        self.init_game()
-        self.ball_dx = self.ball_speed
-        self.ball_dy = -self.ball_speed
-
-        self.game_loop()
-
-
-if __name__ == "__main__":
-    root = tk.Tk()
-    root.title("ChaosBreakout")
-    root.resizable(False, False)
-    game = ChaosBreakout(root)
-    root.mainloop()
\ No newline at end of file
+import argparse
+import random
+import tkinter as tk
+
+from autopilot import Autopilot, key_changes
+from balls import STORM_BALLS
+from batch import CanvasBatch
+from engine import World
+from levels import DEFAULT_BOARD, Board, LayoutLibrary
+from pool import ItemPool
+from profiler import FrameProfiler
+from replay import (
+    InputState, InputQueue, Recording, LEFT_DOWN, LEFT_UP, RIGHT_DOWN, RIGHT_UP, PAUSE, RESTART, PADDLE_SPEED, BALL_SPEED,
+    CHAOS_CHANCE, MEGA_CHAOS
+)
+from scheduler import FrameScheduler, IdleTime
+from simthread import SimulationThread
+from spectator import SpectatorServer
+from view import View
+
+ATTRACT_RESTART_MS = 3000
+
+CHAOS_COLORS = {
+    "reverse": "#f72585",
+    "multiball": "#4361ee",
+    "bigpaddle": "#80ed99",
+    "ghostball": "#adb5bd",
+    "shrinkpad": "#ff6b6b",
+    "invisiblepad": "#222222",
+    "drunkpad": "#e29578",
+    "partybricks": "#ffbe0b",
+    "confusion": "#9d4edd",
+    "darkness": "#000000",
+    "splitpad": "#e0aaff",
+    "slippery": "#72efdd",
+    "gunpad": "#d00000",
+    "shuffler": "#ffb703",
+    "flipview": "#9ae3d3"
+}
+
+
+class ChaosBreakout:
+    def __init__(self, root, seed=None, multiball_count=1, record_path=None, layouts=None, spectate_port=None,
+                 board=DEFAULT_BOARD, endless=False, threaded=False, autopilot=False, spectate_host="127.0.0.1"):
+        self.root = root
+        self.board = board
+        self.canvas = tk.Canvas(root, width=board.width, height=board.height, bg="#1e1e1e", highlightthickness=0)
+        self.canvas.grid(row=0, column=1, rowspan=3)
+        self.draw = CanvasBatch(self.canvas)
+
+        if seed is None:
+            seed = random.randrange(2 ** 63)
+        self.world = World(seed, multiball_count, LayoutLibrary(layouts) if layouts else None, board, endless)
+        self.input_state = InputState()
+        self.input_queue = InputQueue()
+        self.latency_probes = []
+        self.probe_x = None
+        self.idle = IdleTime()
+        self.recording = None
+        if record_path:
+            self.recording = Recording(seed, multiball_count, layouts=layouts, board=board, endless=endless)
+        self.record_path = record_path
+        self.profiler = FrameProfiler()
+        self.world.profiler = self.profiler
+        self.frame = self.world
+        self.simulation = None
+        self.autopilot = Autopilot() if autopilot else None
+        self.attract_after = None
+        self.frame_open = False
+        self.profile_visible = False
+        self.frames_rendered = 0
+        self.brick_items = {}
+        self.ball_items = {}
+        self.bullet_items = {}
+        self.split_items = {}
+        self.paddle_hidden = False
+        self.ball_color = None
+        self.dark_visible = False
+        self.view = View(board.height)
+        self.pending_events = []
+        self.spectators = None
+        if spectate_port is not None:
+            self.spectators = SpectatorServer(spectate_host, spectate_port)
+            self.spectators.start()
+
+        self.build_sidebar()
+        self.build_canvas()
+        self.render(self.world.drain_events())
+        self.bind_keys()
+        if threaded:
+            self.scheduler = FrameScheduler(root, self.take_frame, self.render_frame, max_steps=1)
+            self.simulation = SimulationThread(self.world, self.recording, self.spectators, self.autopilot,
+                                               clock=lambda: self.scheduler.clock())
+            self.frame = self.simulation.buffer.take()
+            self.simulation.start()
+        else:
+            self.scheduler = FrameScheduler(root, self.game_step, self.render_frame)
+        self.scheduler.start()
+
+    def build_sidebar(self):
+        self.sidebar = tk.Frame(self.root, width=260, height=self.board.height, bg="#f3ede5")
+        self.sidebar.grid(row=0, column=0, sticky="ns")
+        self.sidebar.grid_propagate(False)
+
+        title = tk.Label(self.sidebar, text="ChaosBreakout", font=("Segoe UI", 17, "bold"), bg="#f3ede5", fg="#3a0ca3")
+        title.pack(pady=(10, 4))
+
+        self.score_label = tk.Label(self.sidebar, text="Score: 0", font=("Segoe UI", 11, "bold"), bg="#f3ede5",
+                                    fg="#222")
+        self.score_label.pack()
+
+        self.highscore_label = tk.Label(self.sidebar, text="High Score: 0", font=("Segoe UI", 10), bg="#f3ede5",
+                                        fg="#777")
+        self.highscore_label.pack()
+
+        self.lives_label = tk.Label(self.sidebar, text="❤ x3", font=("Segoe UI", 11), bg="#f3ede5", fg="#e63946")
+        self.lives_label.pack(pady=(0, 10))
+
+        tk.Label(self.sidebar, text="Chaos Event", font=("Segoe UI", 11, "underline"), bg="#f3ede5", fg="#444").pack()
+
+        self.chaos_label = tk.Label(
+            self.sidebar, text="None", font=("Segoe UI", 10, "bold"),
+            fg="#d00000", bg="#fffdf5", width=25, height=2, relief="ridge", bd=2
+        )
+        self.chaos_label.pack(pady=(2, 12), padx=10)
+
+        tk.Label(self.sidebar, text="Settings", font=("Segoe UI", 11, "underline"), bg="#f3ede5", fg="#444").pack()
+
+        for text, varname, from_, to, update_fn in [
+            ("Paddle Speed", "speed_slider", 3, 15, self.update_speed),
+            ("Ball Speed", "ball_slider", 2, 20, self.update_ball_speed),
+            ("Chaos Chance", "chaos_slider", 0, 100, self.update_chaos)
+        ]:
+            tk.Label(self.sidebar, text=text, font=("Segoe UI", 10), bg="#f3ede5").pack()
+            slider = tk.Scale(self.sidebar, from_=from_, to=to, orient="horizontal",
+                              command=update_fn, bg="#f3ede5", length=200)
+            if varname == "chaos_slider":
+                slider.set(100)
+            else:
+                slider.set(getattr(self.world, text.lower().replace(" ", "_")))
+
+            slider.pack(pady=(0, 6))
+            setattr(self, varname, slider)
+
+        self.chaos_value_label = tk.Label(self.sidebar, text=f"{int(self.world.chaos_chance * 100)}%",
+                                          font=("Segoe UI", 10, "italic"), bg="#f3ede5", fg="#555")
+        self.chaos_value_label.pack(pady=(0, 10))
+
+        self.mega_btn = tk.Button(self.sidebar, text="Mega Chaos: Off", font=("Segoe UI", 10),
+                                  command=self.toggle_mega_chaos, bg="#f3ede5", activebackground="#e0aaff")
+        self.mega_btn.pack(pady=(0, 4))
+
+        self.restart_btn = tk.Button(self.sidebar, text="Restart Game", font=("Segoe UI", 10, "bold"),
+                                     command=self.restart_game, bg="#d8f3dc", fg="#000",
+                                     activebackground="#b7e4c7")
+        self.restart_btn.pack(pady=(6, 8))
+
+    def apply_input(self, code, value=0):
+        if self.simulation:
+            self.simulation.send(code, value)
+            return
+        if self.recording:
+            self.recording.record(self.world.ticks, code, value)
+        self.input_state.apply(self.world, code, value)
+
+    def update_speed(self, val):
+        self.apply_input(PADDLE_SPEED, int(val))
+
+    def update_ball_speed(self, val):
+        self.apply_input(BALL_SPEED, int(val))
+
+    def update_chaos(self, val):
+        self.apply_input(CHAOS_CHANCE, int(val))
+        self.draw.label(self.chaos_value_label, text=f"{int(val)}%")
+        if not self.scheduler.running:
+            self.draw.flush()
+
+    def build_canvas(self):
+        width, height = self.board.width, self.board.height
+        self.brick_pool = ItemPool(self.draw, "rectangle", outline="#444", width=1, tags="brick")
+        self.ball_pool = ItemPool(self.draw, "oval", fill="#ffffff", outline="", width=0)
+        self.bullet_pool = ItemPool(self.draw, "rectangle", fill="red")
+        self.split_pool = ItemPool(self.draw, "rectangle", fill="#fff", outline="")
+        self.pools = (self.brick_pool, self.ball_pool, self.bullet_pool, self.split_pool)
+
+        self.pause_tip = self.draw.create_text(
+            width // 2, 12,
+            text="Press SPACE to pause",
+            font=("Segoe UI", 10, "italic"),
+            fill="#888888"
+        )
+        self.paddle = self.draw.create_rectangle(*self.world.paddle.coords(), fill="#ffffff", outline="", width=0)
+        self.dark_overlay = self.draw.create_rectangle(0, 0, width, height, fill="black",
+                                                       stipple="gray50", state="hidden")
+        self.pause_overlay = self.draw.create_rectangle(0, 0, width, height, fill="black",
+                                                        stipple="gray50", state="hidden")
+        self.pause_text = self.draw.create_text(width // 2, height // 2, text="PAUSED",
+                                                fill="#ffffff", font=("Segoe UI", 24, "bold"), state="hidden")
+        self.profile_overlay = self.draw.create_text(8, height - 8, anchor="sw", fill="#00ff88",
+                                                     font=("Consolas", 9), text="", state="hidden")
+
+    def toggle_mega_chaos(self):
+        enabled = self.frame.max_effects == 1
+        self.apply_input(MEGA_CHAOS, int(enabled))
+        self.mega_btn.config(text=f"Mega Chaos: {'On' if enabled else 'Off'}")
+
+    def init_game(self):
+        self.brick_pool.release_all(self.brick_items)
+        self.ball_pool.release_all(self.ball_items)
+        self.bullet_pool.release_all(self.bullet_items)
+        self.split_pool.release_all(self.split_items)
+        self.paddle_hidden = False
+        self.ball_color = None
+        self.dark_visible = False
+        self.draw.itemconfig(self.paddle, state="normal")
+        self.draw.itemconfig(self.dark_overlay, state="hidden")
+        self.draw.itemconfig(self.pause_overlay, state="hidden")
+        self.draw.itemconfig(self.pause_text, state="hidden")
+        self.place_tip()
+
+        for brick in self.frame.bricks:
+            self.brick_items[brick.id] = self.brick_pool.acquire(*self.view.rect(*brick.coords()), fill=brick.color)
+        self.draw.tag_lower("brick")
+
+    def place_bricks(self):
+        for brick in self.frame.bricks:
+            self.draw.coords(self.brick_items[brick.id], *self.view.rect(*brick.coords()))
+        self.place_tip()
+
+    def place_tip(self):
+        self.draw.coords(self.pause_tip, self.board.width // 2, self.view.y(12))
+
+    def bind_keys(self):
+        self.canvas.focus_set()
+        self.canvas.bind("<KeyPress-Left>", lambda e: self.set_key("left", True))
+        self.canvas.bind("<KeyRelease-Left>", lambda e: self.set_key("left", False))
+        self.canvas.bind("<KeyPress-Right>", lambda e: self.set_key("right", True))
+        self.canvas.bind("<KeyRelease-Right>", lambda e: self.set_key("right", False))
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+        self.canvas.bind("<space>", self.toggle_pause)
+        self.canvas.bind("<F3>", self.toggle_profile_overlay)
+        self.canvas.bind("<F4>", self.export_profile)
+
+    def toggle_profile_overlay(self, event=None):
+        self.profile_visible = not self.profile_visible
+        if self.profile_visible:
+            self.draw.itemconfig(self.profile_overlay, state="normal", text=self.overlay_text())
+            self.draw.tag_raise(self.profile_overlay)
+        else:
+            self.draw.itemconfig(self.profile_overlay, state="hidden")
+
+    def overlay_text(self):
+        created = sum(pool.created for pool in self.pools)
+        pooled = sum(len(pool.free) for pool in self.pools)
+        text = (self.profiler.overlay_text() + "\n" + self.draw.stats_text() +
+                f"\npooled items: {created} created, {pooled} idle")
+        if self.simulation:
+            text += "\n" + self.simulation.overlay_text()
+        else:
+            text += f"\nframe scheduler: {self.scheduler.dropped_steps} ticks dropped"
+        return text
+
+    def export_profile(self, event=None):
+        self.profiler.export_json("profile.json")
+        self.profiler.export_csv("profile.csv")
+        if self.simulation:
+            self.simulation.export_profile("profile_simulation")
+
+    def toggle_pause(self, event=None):
+        if not self.frame.running:
+            return
+        self.apply_input(PAUSE)
+        if self.simulation:
+            return
+        self.world.drain_events()
+        self.idle.update(not self.world.paused, self.scheduler.clock())
+        self.show_pause(self.world.paused)
+        if self.world.paused:
+            self.draw.flush()
+            self.scheduler.stop()
+            if self.spectators:
+                self.spectators.publish(self.world)
+        else:
+            self.scheduler.start()
+
+    def show_pause(self, paused):
+        state = "normal" if paused else "hidden"
+        self.draw.itemconfig(self.pause_overlay, state=state)
+        self.draw.itemconfig(self.pause_text, state=state)
+        if paused:
+            self.draw.tag_raise(self.pause_overlay)
+            self.draw.tag_raise(self.pause_text)
+
+    def set_key(self, key, value):
+        if key == "left":
+            code = LEFT_DOWN if value else LEFT_UP
+        else:
+            code = RIGHT_DOWN if value else RIGHT_UP
+        if self.simulation:
+            self.simulation.push_key(self.scheduler.clock(), code)
+        else:
+            self.input_queue.push(self.scheduler.clock(), code)
+
+    def paddle_x(self):
+        world = self.frame
+        return world.split_paddles[0].x1 if world.split_paddles else world.paddle.x1
+
+    def probe_latency(self):
+        probes = self.latency_probes
+        x = self.paddle_x()
+        if probes:
+            idle = self.simulation.idle if self.simulation else self.idle
+            now = idle.active(self.scheduler.clock())
+            moved = x - self.probe_x if self.probe_x is not None else 0
+            tag = self.frame.active_effect or "none"
+            waiting = []
+            for stamp, direction in probes:
+                if moved * direction > 0:
+                    self.profiler.record("input", tag, int((now - stamp) * 1e9))
+                elif now - stamp <= 1:
+                    waiting.append((stamp, direction))
+            self.latency_probes = waiting
+        self.probe_x = x
+
+    def render(self, events):
+        self.profiler.enter("redraw")
+        world = self.frame
+        view_dirty = world.flipped != self.view.flipped
+        self.view.flipped = world.flipped
+        new_level = any(kind == "level" for kind, *_ in events)
+        if new_level:
+            self.init_game()
+        status_dirty = False
+        chaos_dirty = new_level
+        bricks_added = recolored = False
+        for kind, *args in events:
+            if new_level and kind in ("brick_added", "brick_removed", "bricks_moved", "bricks_recolored"):
+                continue
+            if kind == "brick_added":
+                brick = args[0]
+                self.brick_items[brick.id] = self.brick_pool.acquire(*self.view.rect(*brick.coords()), fill=brick.color)
+                bricks_added = True
+            elif kind == "brick_removed":
+                self.brick_pool.release(self.brick_items.pop(args[0].id))
+            elif kind == "bricks_moved":
+                view_dirty = True
+            elif kind == "bricks_recolored":
+                recolored = True
+            elif kind == "status":
+                status_dirty = True
+            elif kind in ("chaos", "chaos_cleared", "game_over"):
+                chaos_dirty = True
+                if kind == "game_over" and self.autopilot:
+                    self.cancel_attract()
+                    self.attract_after = self.root.after(ATTRACT_RESTART_MS, self.restart_game)
+            elif kind == "pause":
+                self.show_pause(args[0])
+        if status_dirty:
+            self.profiler.enter("status")
+            self.update_status()
+            self.profiler.exit()
+        if chaos_dirty:
+            self.update_chaos_label()
+        if view_dirty and not new_level:
+            self.place_bricks()
+        if bricks_added:
+            self.draw.tag_lower("brick")
+        if recolored and not new_level:
+            for brick in world.bricks:
+                self.draw.itemconfig(self.brick_items[brick.id], fill=brick.color)
+
+        self.draw.coords(self.paddle, *self.view.rect(*world.paddle.coords()))
+        if world.paddle.hidden != self.paddle_hidden:
+            self.paddle_hidden = world.paddle.hidden
+            self.draw.itemconfig(self.paddle, state="hidden" if self.paddle_hidden else "normal")
+
+        acquired = self.sync_balls()
+        if (world.ball, world.ball_color) != self.ball_color:
+            self.ball_color = (world.ball, world.ball_color)
+            item = self.ball_items.get(world.ball)
+            if item is not None:
+                self.draw.itemconfig(item, fill=world.ball_color)
+        acquired |= self.sync_items(self.split_items, world.split_paddles, self.split_pool)
+        acquired |= self.sync_items(self.bullet_items, world.gun_bullets.values(), self.bullet_pool)
+
+        dark_changed = world.darkness != self.dark_visible
+        if dark_changed:
+            self.dark_visible = world.darkness
+            self.draw.itemconfig(self.dark_overlay, state="normal" if self.dark_visible else "hidden")
+        if self.dark_visible and (dark_changed or acquired):
+            self.draw.tag_raise(self.dark_overlay)
+
+        self.frames_rendered += 1
+        if self.profile_visible and self.frames_rendered % 30 == 0:
+            self.draw.itemconfig(self.profile_overlay, text=self.overlay_text())
+            self.draw.tag_raise(self.profile_overlay)
+        self.draw.flush()
+        self.probe_latency()
+        if self.spectators and not self.simulation:
+            self.spectators.publish(world)
+        self.profiler.exit()
+
+    def sync_items(self, items, entities, pool):
+        stale = set(items)
+        acquired = False
+        for entity in entities:
+            item = items.get(entity.id)
+            if item is None:
+                items[entity.id] = pool.acquire(*self.view.rect(*entity.coords()))
+                acquired = True
+            else:
+                stale.discard(entity.id)
+                self.draw.coords(item, *self.view.rect(*entity.coords()))
+        for entity_id in stale:
+            pool.release(items.pop(entity_id))
+        return acquired
+
+    def sync_balls(self):
+        items = self.ball_items
+        view = self.view
+        stale = set(items)
+        acquired = False
+        for ball_id, *box in self.frame.balls.boxes():
+            x1, y1, x2, y2 = view.rect(*box)
+            item = items.get(ball_id)
+            if item is None:
+                items[ball_id] = self.ball_pool.acquire(x1, y1, x2, y2)
+                acquired = True
+            else:
+                stale.discard(ball_id)
+                self.draw.coords(item, x1, y1, x2, y2)
+        for ball_id in stale:
+            self.ball_pool.release(items.pop(ball_id))
+        return acquired
+
+    def update_chaos_label(self):
+        effect = self.frame.active_effect
+        if not self.frame.running:
+            self.draw.label(self.chaos_label, text="💀 GAME OVER", fg="white", bg="red")
+        elif effect is None:
+            self.draw.label(self.chaos_label, text="None", fg="#d00000", bg="#fffdf5")
+        else:
+            extra = len(self.frame.effects) - 1
+            text = f"{effect.upper()}! +{extra}" if extra else f"{effect.upper()}!"
+            self.draw.label(self.chaos_label, text=text, fg="#fff", bg=CHAOS_COLORS.get(effect, "#222"))
+
+    def update_status(self):
+        self.draw.label(self.score_label, text=f"Score: {self.frame.score}")
+        self.draw.label(self.highscore_label, text=f"High Score: {self.frame.highscore}")
+        self.draw.label(self.lives_label, text=f"❤ x{self.frame.lives}")
+
+    def game_step(self):
+        if not self.frame_open:
+            self.profiler.begin_frame()
+            self.frame_open = True
+        tick_end = self.scheduler.tick_end
+        for stamp, code, offset in self.input_queue.due(tick_end):
+            if code in (LEFT_DOWN, RIGHT_DOWN):
+                direction = -1 if code == LEFT_DOWN else 1
+                self.latency_probes.append((self.idle.active(stamp),
+                                            -direction if self.world.reverse_controls else direction))
+            self.apply_input(code, offset)
+        if self.autopilot:
+            for code in key_changes(self.input_state, self.autopilot.inputs(self.world)):
+                self.apply_input(code)
+        self.world.step(self.input_state.inputs())
+        if not self.world.running:
+            self.idle.update(False, tick_end)
+        self.pending_events.extend(self.world.drain_events())
+        return self.world.running and not self.world.paused
+
+    def take_frame(self):
+        if self.simulation.error is not None:
+            self.scheduler.stop()
+            raise self.simulation.error
+        snapshot = self.simulation.buffer.take()
+        if snapshot is not None:
+            if not self.frame_open:
+                self.profiler.begin_frame()
+                self.frame_open = True
+            self.frame = snapshot
+            self.pending_events.extend(snapshot.events)
+            self.latency_probes.extend(snapshot.probes)
+        return True
+
+    def render_frame(self):
+        if self.simulation and not self.frame_open:
+            return
+        events = self.pending_events
+        self.pending_events = []
+        self.render(events)
+        if self.frame_open:
+            self.profiler.end_frame(self.frame.active_effect)
+            self.frame_open = False
+
+    def cancel_attract(self):
+        if self.attract_after is not None:
+            self.root.after_cancel(self.attract_after)
+            self.attract_after = None
+
+    def restart_game(self):
+        self.cancel_attract()
+        self.apply_input(RESTART)
+        if self.simulation:
+            return
+        self.idle.update(True, self.scheduler.clock())
+        self.pending_events.extend(self.world.drain_events())
+        self.render_frame()
+        self.scheduler.start()
+
+    def close(self):
+        self.cancel_attract()
+        if self.simulation:
+            self.simulation.stop()
+        if self.recording:
+            self.recording.length = max(self.recording.length, self.world.ticks)
+            self.recording.save(self.record_path)
+        if self.spectators:
+            self.spectators.stop()
+        self.root.destroy()
+
+
+def parse_size(text):
+    first, _, second = text.lower().partition("x")
+    try:
+        size = int(first), int(second)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected AxB, got {text!r}")
+    if min(size) < 1:
+        raise argparse.ArgumentTypeError(f"both sizes must be positive, got {text!r}")
+    return size
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ChaosBreakout")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--storm", action="store_true", help="multiball releases a storm of balls")
+    parser.add_argument("--record", metavar="PATH", help="save a replay of this session when the window closes")
+    parser.add_argument("--layouts", metavar="PATH", help="pick levels from a layout library built by levels.py")
+    parser.add_argument("--spectate", type=int, nargs="?", const=8765, metavar="PORT",
+                        help="stream the game to spectator.py viewers on this TCP port")
+    parser.add_argument("--spectate-host", default="127.0.0.1", metavar="HOST",
+                        help="interface the spectator stream listens on (default local only; 0.0.0.0 for all)")
+    parser.add_argument("--board", type=parse_size, default=(DEFAULT_BOARD.width, DEFAULT_BOARD.height),
+                        metavar="WxH", help="playfield size in pixels")
+    parser.add_argument("--grid", type=parse_size, default=(DEFAULT_BOARD.rows, DEFAULT_BOARD.columns),
+                        metavar="ROWSxCOLUMNS", help="brick rows and columns")
+    parser.add_argument("--endless", action="store_true", help="scroll new brick rows in from the top forever")
+    parser.add_argument("--autopilot", action="store_true",
+                        help="attract mode: the predictive autopilot plays and restarts after game over")
+    parser.add_argument("--threaded", action="store_true",
+                        help="run the simulation on a worker thread and only render its snapshots on the Tk thread")
+    args = parser.parse_args()
+    board = Board(*args.board, *args.grid)
+    try:
+        board.validate()
+    except ValueError as error:
+        parser.error(str(error))
+
+    root = tk.Tk()
+    root.title("ChaosBreakout")
+    root.resizable(False, False)
+    game = ChaosBreakout(root, seed=args.seed, multiball_count=STORM_BALLS if args.storm else 1,
+                         record_path=args.record, layouts=args.layouts, spectate_port=args.spectate,
+                         spectate_host=args.spectate_host, board=board, endless=args.endless,
+                         threaded=args.threaded, autopilot=args.autopilot)
+    root.mainloop()
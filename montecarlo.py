@@ -0,0 +1,136 @@
+import argparse
+import csv
+import itertools
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+from autopilot import Autopilot
+from bench import scripted_paddle
+from engine import World, CHAOS_EVENTS, TICK_MS
+from profiler import percentile
+
+PARAMS = ("paddle_speed", "ball_speed", "chaos_chance", "min_bricks", "chaos_min_ms", "chaos_max_ms")
+EFFECTS = ("none",) + tuple(CHAOS_EVENTS)
+COLUMNS = PARAMS + ("seed", "ticks", "survived", "score", "levels") + \
+    tuple(f"deaths_{effect}" for effect in EFFECTS) + tuple(f"exposure_{effect}" for effect in EFFECTS)
+
+
+def play_game(task):
+    params, seed, max_ticks, player = task
+    player = Autopilot().inputs if player == "autopilot" else scripted_paddle
+    world = World(seed)
+    world.set_paddle_speed(params["paddle_speed"])
+    world.set_chaos_chance(params["chaos_chance"])
+    world.min_bricks = params["min_bricks"]
+    world.chaos_duration = (params["chaos_min_ms"], params["chaos_max_ms"])
+    world.restart()
+    world.set_ball_speed(params["ball_speed"])
+
+    deaths = dict.fromkeys(EFFECTS, 0)
+    exposure = dict.fromkeys(EFFECTS, 0)
+    levels = 0
+    while world.running and world.ticks < max_ticks:
+        for kind, *args in world.step(player(world)):
+            if kind == "life_lost":
+                deaths[args[0] or "none"] += 1
+            elif kind == "level":
+                levels += 1
+        exposure[world.active_effect or "none"] += 1
+
+    row = dict(params)
+    row.update(seed=seed, ticks=world.ticks, survived=int(world.running), score=world.score, levels=levels)
+    row.update({f"deaths_{effect}": count for effect, count in deaths.items()})
+    row.update({f"exposure_{effect}": count for effect, count in exposure.items()})
+    return row
+
+
+def parameter_grid(args):
+    durations = [tuple(int(ms) for ms in window.split(":")) for window in args.chaos_duration]
+    for paddle_speed, ball_speed, chaos_chance, min_bricks, (low, high) in itertools.product(
+            args.paddle_speed, args.ball_speed, args.chaos_chance, args.min_bricks, durations):
+        yield {
+            "paddle_speed": paddle_speed,
+            "ball_speed": ball_speed,
+            "chaos_chance": chaos_chance,
+            "min_bricks": min_bricks,
+            "chaos_min_ms": low,
+            "chaos_max_ms": high
+        }
+
+
+class Aggregate:
+    def __init__(self):
+        self.cells = {}
+        self.deaths = dict.fromkeys(EFFECTS, 0)
+        self.exposure = dict.fromkeys(EFFECTS, 0)
+
+    def add(self, row):
+        key = tuple(row[name] for name in PARAMS)
+        cell = self.cells.setdefault(key, {"games": 0, "survived": 0, "ticks": [], "scores": []})
+        cell["games"] += 1
+        cell["survived"] += row["survived"]
+        cell["ticks"].append(row["ticks"])
+        cell["scores"].append(row["score"])
+        for effect in EFFECTS:
+            self.deaths[effect] += row[f"deaths_{effect}"]
+            self.exposure[effect] += row[f"exposure_{effect}"]
+
+    def print_tables(self, out=sys.stdout):
+        print("\nSurvival and score by parameters", file=out)
+        header = "".join(f"{name:>14}" for name in PARAMS)
+        print(f"{header}{'games':>8}{'survive%':>10}{'mean s':>9}{'p50 score':>11}{'mean score':>12}", file=out)
+        for key, cell in sorted(self.cells.items()):
+            games = cell["games"]
+            mean_seconds = sum(cell["ticks"]) / games * TICK_MS / 1000
+            print("".join(f"{value:>14}" for value in key) +
+                  f"{games:>8}{100 * cell['survived'] / games:>10.1f}{mean_seconds:>9.1f}"
+                  f"{percentile(cell['scores'], 50):>11}{sum(cell['scores']) / games:>12.0f}", file=out)
+
+        print("\nDeaths per minute of exposure by active chaos event", file=out)
+        print(f"{'effect':<14}{'deaths':>8}{'minutes':>10}{'rate':>8}", file=out)
+        rates = []
+        for effect in EFFECTS:
+            minutes = self.exposure[effect] * TICK_MS / 60000
+            rates.append((self.deaths[effect] / minutes if minutes else 0, effect, minutes))
+        for rate, effect, minutes in sorted(rates, reverse=True):
+            print(f"{effect:<14}{self.deaths[effect]:>8}{minutes:>10.1f}{rate:>8.2f}", file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo balancing runs of headless ChaosBreakout games")
+    parser.add_argument("--paddle-speed", type=int, nargs="+", default=[8])
+    parser.add_argument("--ball-speed", type=int, nargs="+", default=[5])
+    parser.add_argument("--chaos-chance", type=float, nargs="+", default=[1.0])
+    parser.add_argument("--min-bricks", type=int, nargs="+", default=[25])
+    parser.add_argument("--chaos-duration", nargs="+", default=["3000:10000"], metavar="MIN:MAX",
+                        help="chaos duration windows in milliseconds")
+    parser.add_argument("--games", type=int, default=100, help="games per parameter combination")
+    parser.add_argument("--max-ticks", type=int, default=60 * 60 * 5, help="cap per game (default 5 minutes)")
+    parser.add_argument("--seed", type=int, default=0, help="first seed; game i uses seed + i")
+    parser.add_argument("--player", choices=("autopilot", "scripted"), default="autopilot")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--out", default="montecarlo.csv")
+    args = parser.parse_args(argv)
+
+    tasks = [(params, args.seed + i, args.max_ticks, args.player)
+             for params in parameter_grid(args) for i in range(args.games)]
+    aggregate = Aggregate()
+    start = time.perf_counter()
+    with open(args.out, "w", newline="") as f, Pool(args.workers) as pool:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        writer.writeheader()
+        for done, row in enumerate(pool.imap_unordered(play_game, tasks, chunksize=4), 1):
+            writer.writerow(row)
+            aggregate.add(row)
+            if done % 100 == 0 or done == len(tasks):
+                f.flush()
+                print(f"\r{done}/{len(tasks)} games", end="", file=sys.stderr)
+    print(f"\n{len(tasks)} games in {time.perf_counter() - start:.1f}s, results in {args.out}", file=sys.stderr)
+    aggregate.print_tables()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
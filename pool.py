@@ -0,0 +1,25 @@
+class ItemPool:
+    def __init__(self, draw, kind, **options):
+        self.draw = draw
+        self.create = getattr(draw, f"create_{kind}")
+        self.options = options
+        self.free = []
+        self.created = 0
+
+    def acquire(self, *coords, **options):
+        if self.free:
+            item = self.free.pop()
+            self.draw.coords(item, *coords)
+            self.draw.itemconfig(item, state="normal", **dict(self.options, **options))
+            return item
+        self.created += 1
+        return self.create(*coords, **dict(self.options, **options))
+
+    def release(self, item):
+        self.draw.itemconfig(item, state="hidden")
+        self.free.append(item)
+
+    def release_all(self, items):
+        for item in items.values():
+            self.release(item)
+        items.clear()
@@ -0,0 +1,139 @@
+import csv
+import json
+import time
+from array import array
+
+PHASES = ("paddle", "balls", "bullets", "chaos", "scroll", "status", "redraw", "input")
+BUCKETS_US = (50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000, 33000, 66000, 133000)
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def histogram(samples):
+    counts = [0] * (len(BUCKETS_US) + 1)
+    for ns in samples:
+        us = ns / 1000
+        for i, bound in enumerate(BUCKETS_US):
+            if us <= bound:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+    return counts
+
+
+class Window:
+    def __init__(self, size):
+        self.size = size
+        self.values = array("q")
+        self.next = 0
+
+    def __len__(self):
+        return len(self.values)
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def append(self, value):
+        if len(self.values) < self.size:
+            self.values.append(value)
+        else:
+            self.values[self.next] = value
+            self.next = (self.next + 1) % self.size
+
+
+class FrameProfiler:
+    def __init__(self, window=600):
+        self.window = window
+        self.samples = {}
+        self.frame_phases = {}
+        self.stack = []
+        self.mark = 0
+        self.frame_start = 0
+
+    def begin_frame(self):
+        self.frame_phases = {}
+        self.stack = []
+        self.frame_start = self.mark = time.perf_counter_ns()
+
+    def enter(self, phase):
+        now = time.perf_counter_ns()
+        if self.stack:
+            top = self.stack[-1]
+            self.frame_phases[top] = self.frame_phases.get(top, 0) + now - self.mark
+        self.stack.append(phase)
+        self.mark = now
+
+    def exit(self):
+        now = time.perf_counter_ns()
+        phase = self.stack.pop()
+        self.frame_phases[phase] = self.frame_phases.get(phase, 0) + now - self.mark
+        self.mark = now
+
+    def end_frame(self, effect=None):
+        tag = effect or "none"
+        total = time.perf_counter_ns() - self.frame_start
+        for phase, ns in self.frame_phases.items():
+            self.record(phase, tag, ns)
+        self.record("frame", tag, total)
+
+    def record(self, phase, tag, ns):
+        key = (phase, tag)
+        window = self.samples.get(key)
+        if window is None:
+            window = self.samples[key] = Window(self.window)
+        window.append(ns)
+
+    def merged(self, phase):
+        merged = []
+        for (name, _), window in self.samples.items():
+            if name == phase:
+                merged.extend(window)
+        return merged
+
+    def summary(self):
+        rows = []
+        for phase in PHASES + ("frame",):
+            samples = self.merged(phase)
+            if samples:
+                rows.append((phase, percentile(samples, 50), percentile(samples, 95), percentile(samples, 99)))
+        return rows
+
+    def overlay_text(self):
+        lines = ["phase      p50    p95    p99 (ms)"]
+        for phase, p50, p95, p99 in self.summary():
+            lines.append(f"{phase:<8} {p50 / 1e6:6.2f} {p95 / 1e6:6.2f} {p99 / 1e6:6.2f}")
+        return "\n".join(lines)
+
+    def report(self):
+        report = []
+        for (phase, tag), window in sorted(self.samples.items()):
+            report.append({
+                "phase": phase,
+                "effect": tag,
+                "count": len(window),
+                "p50_us": percentile(window, 50) / 1000,
+                "p95_us": percentile(window, 95) / 1000,
+                "p99_us": percentile(window, 99) / 1000,
+                "max_us": max(window) / 1000,
+                "histogram": histogram(window)
+            })
+        return report
+
+    def export_json(self, path):
+        with open(path, "w") as f:
+            json.dump({"buckets_us": list(BUCKETS_US), "samples": self.report()}, f, indent=2)
+
+    def export_csv(self, path):
+        bucket_names = [f"le_{bound}us" for bound in BUCKETS_US] + ["gt_max"]
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["phase", "effect", "count", "p50_us", "p95_us", "p99_us", "max_us"] + bucket_names)
+            for row in self.report():
+                writer.writerow([row["phase"], row["effect"], row["count"], row["p50_us"], row["p95_us"],
+                                 row["p99_us"], row["max_us"]] + row["histogram"])
@@ -0,0 +1,267 @@
+import argparse
+import bisect
+import pickle
+import struct
+import sys
+import time
+from collections import deque
+
+from engine import World, Inputs, TICK_MS
+from levels import DEFAULT_BOARD, Board, LayoutLibrary
+
+MAGIC = b"CBRP"
+VERSION = 4
+HEADER = struct.Struct("<4sBqH")
+
+END = 0
+LEFT_DOWN = 1
+LEFT_UP = 2
+RIGHT_DOWN = 3
+RIGHT_UP = 4
+PAUSE = 5
+RESTART = 6
+PADDLE_SPEED = 7
+BALL_SPEED = 8
+CHAOS_CHANCE = 9
+MEGA_CHAOS = 10
+
+KEY_CODES = {LEFT_DOWN: ("left", True), LEFT_UP: ("left", False), RIGHT_DOWN: ("right", True),
+             RIGHT_UP: ("right", False)}
+VALUE_CODES = {PADDLE_SPEED, BALL_SPEED, CHAOS_CHANCE, MEGA_CHAOS} | set(KEY_CODES)
+SUBTICKS = 256
+
+
+class InputState:
+    def __init__(self):
+        self.left = False
+        self.right = False
+        self.edges = []
+
+    def inputs(self):
+        edges = self.edges
+        if not edges:
+            return Inputs(self.left and not self.right, self.right)
+        self.edges = []
+        edges.append((SUBTICKS, False, False))
+        left = right = 0
+        for (start, held_left, held_right), (end, _, _) in zip(edges, edges[1:]):
+            if held_right:
+                right += end - start
+            elif held_left:
+                left += end - start
+        return Inputs(left / SUBTICKS, right / SUBTICKS)
+
+    def press(self, key, down, offset):
+        if not self.edges:
+            self.edges.append((0, self.left, self.right))
+        setattr(self, key, down)
+        self.edges.append((max(offset, self.edges[-1][0]), self.left, self.right))
+
+    def apply(self, world, code, value=0):
+        if code in KEY_CODES:
+            self.press(*KEY_CODES[code], value)
+        elif code == PAUSE:
+            world.toggle_pause()
+        elif code == RESTART:
+            world.restart()
+        elif code == PADDLE_SPEED:
+            world.set_paddle_speed(value)
+        elif code == BALL_SPEED:
+            world.set_ball_speed(value)
+        elif code == CHAOS_CHANCE:
+            world.set_chaos_chance(value / 100)
+        elif code == MEGA_CHAOS:
+            world.set_mega_chaos(bool(value))
+
+
+class InputQueue:
+    def __init__(self, tick=TICK_MS / 1000):
+        self.tick = tick
+        self.events = deque()
+        self.held = {"left": False, "right": False}
+
+    def push(self, stamp, code):
+        key, down = KEY_CODES[code]
+        if self.held[key] == down:
+            return False
+        self.held[key] = down
+        self.events.append((stamp, code))
+        return True
+
+    def due(self, tick_end):
+        events = self.events
+        start = tick_end - self.tick
+        while events and events[0][0] <= tick_end:
+            stamp, code = events.popleft()
+            offset = int((stamp - start) / self.tick * SUBTICKS)
+            yield stamp, code, min(SUBTICKS - 1, max(0, offset))
+
+
+def write_varint(out, value):
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data, pos):
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+class Recording:
+    def __init__(self, seed, multiball_count=1, events=None, length=0, layouts=None, board=DEFAULT_BOARD,
+                 endless=False):
+        self.seed = seed
+        self.multiball_count = multiball_count
+        self.events = events if events is not None else []
+        self.length = length
+        self.layouts = layouts
+        self.board = board
+        self.endless = endless
+
+    def record(self, tick, code, value=0):
+        self.events.append((tick, code, value))
+        self.length = max(self.length, tick)
+
+    def to_bytes(self):
+        out = bytearray(HEADER.pack(MAGIC, VERSION, self.seed, self.multiball_count))
+        layouts = (self.layouts or "").encode()
+        write_varint(out, len(layouts))
+        out += layouts
+        for value in self.board:
+            write_varint(out, value)
+        out.append(self.endless)
+        last = 0
+        for tick, code, value in self.events + [(self.length, END, 0)]:
+            write_varint(out, tick - last)
+            out.append(code)
+            if code in VALUE_CODES:
+                write_varint(out, value)
+            last = tick
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, version, seed, multiball_count = HEADER.unpack_from(data)
+        if magic != MAGIC or version not in (2, 3, VERSION):
+            raise ValueError("not a ChaosBreakout recording")
+        value_codes = VALUE_CODES if version >= 3 else VALUE_CODES - set(KEY_CODES)
+        recording = cls(seed, multiball_count)
+        size, pos = read_varint(data, HEADER.size)
+        recording.layouts = data[pos:pos + size].decode() or None
+        pos += size
+        if version >= 4:
+            board = []
+            for _ in Board._fields:
+                value, pos = read_varint(data, pos)
+                board.append(value)
+            recording.board = Board(*board)
+            recording.endless = bool(data[pos])
+            pos += 1
+        tick = 0
+        while pos < len(data):
+            delta, pos = read_varint(data, pos)
+            tick += delta
+            code = data[pos]
+            pos += 1
+            value = 0
+            if code in value_codes:
+                value, pos = read_varint(data, pos)
+            if code == END:
+                recording.length = tick
+                break
+            recording.events.append((tick, code, value))
+        return recording
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+class Player:
+    def __init__(self, recording, snapshot_every=600):
+        self.recording = recording
+        self.snapshot_every = snapshot_every
+        library = LayoutLibrary(recording.layouts) if recording.layouts else None
+        self.world = World(recording.seed, recording.multiball_count, library, recording.board, recording.endless)
+        self.state = InputState()
+        self.next_event = 0
+        self.snapshot_ticks = []
+        self.snapshots = []
+        self.take_snapshot()
+
+    @property
+    def tick(self):
+        return self.world.ticks
+
+    def take_snapshot(self):
+        blob = pickle.dumps((self.world, self.state, self.next_event), pickle.HIGHEST_PROTOCOL)
+        self.snapshot_ticks.append(self.world.ticks)
+        self.snapshots.append(blob)
+
+    def restore(self, index):
+        self.world, self.state, self.next_event = pickle.loads(self.snapshots[index])
+
+    def apply_due_events(self):
+        events = self.recording.events
+        while self.next_event < len(events) and events[self.next_event][0] <= self.world.ticks:
+            _, code, value = events[self.next_event]
+            self.state.apply(self.world, code, value)
+            self.next_event += 1
+
+    def run_until(self, tick):
+        world = self.world
+        while world.ticks < tick:
+            self.apply_due_events()
+            world = self.world
+            if not world.running or world.paused:
+                break
+            world.step(self.state.inputs())
+            if world.ticks % self.snapshot_every == 0 and world.ticks > self.snapshot_ticks[-1]:
+                self.take_snapshot()
+        return self.world
+
+    def run_to_end(self):
+        return self.run_until(self.recording.length)
+
+    def seek(self, tick):
+        index = bisect.bisect_right(self.snapshot_ticks, tick) - 1
+        if self.snapshot_ticks[index] < self.world.ticks <= tick:
+            return self.run_until(tick)
+        self.restore(index)
+        return self.run_until(tick)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play back a ChaosBreakout recording headless")
+    parser.add_argument("path")
+    parser.add_argument("--seek", type=int, help="stop at this tick instead of the end")
+    parser.add_argument("--snapshot-every", type=int, default=600)
+    args = parser.parse_args(argv)
+
+    recording = Recording.load(args.path)
+    player = Player(recording, args.snapshot_every)
+    start = time.perf_counter()
+    world = player.seek(args.seek) if args.seek is not None else player.run_to_end()
+    elapsed = time.perf_counter() - start
+    rate = world.ticks / elapsed if elapsed else 0
+    print(f"seed {recording.seed}: {len(recording.events)} events, {recording.length} ticks recorded")
+    print(f"tick {world.ticks}: score {world.score}, lives {world.lives}, effects {', '.join(world.effects) or 'none'}")
+    print(f"{world.ticks} ticks in {elapsed:.3f}s ({rate:.0f} ticks/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+import heapq
+import time
+
+from constants import TICK_MS
+
+
+class Timer:
+    __slots__ = ("callback", "interval", "cancelled")
+
+    def __init__(self, callback, interval):
+        self.callback = callback
+        self.interval = interval
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class TimerQueue:
+    def __init__(self):
+        self.heap = []
+        self.seq = 0
+        self.cancelled = 0
+
+    def __len__(self):
+        return sum(1 for _, _, timer in self.heap if not timer.cancelled)
+
+    def push(self, due, timer):
+        self.seq += 1
+        heapq.heappush(self.heap, (due, self.seq, timer))
+        return timer
+
+    def after(self, now, delay, callback):
+        return self.push(now + delay, Timer(callback, None))
+
+    def every(self, now, interval, callback):
+        return self.push(now + interval, Timer(callback, interval))
+
+    def run_due(self, now):
+        heap = self.heap
+        while heap and heap[0][0] <= now:
+            due, _, timer = heapq.heappop(heap)
+            if timer.cancelled:
+                continue
+            if timer.interval is not None:
+                self.push(due + timer.interval, timer)
+            timer.callback()
+
+    def cancel(self, timer):
+        timer.cancel()
+        self.cancelled += 1
+        if self.cancelled > 64 and self.cancelled * 2 > len(self.heap):
+            self.heap = [entry for entry in self.heap if not entry[2].cancelled]
+            heapq.heapify(self.heap)
+            self.cancelled = 0
+
+
+class IdleTime:
+    def __init__(self):
+        self.total = 0.0
+        self.before = 0.0
+        self.start = None
+        self.end = None
+
+    def update(self, active, now):
+        if active:
+            if self.start is not None and self.end is None:
+                self.end = now
+                self.total = self.before + now - self.start
+        elif self.start is None or self.end is not None:
+            self.before = self.total
+            self.start, self.end = now, None
+
+    def active(self, stamp):
+        if self.start is None or stamp < self.start:
+            return stamp - self.before
+        if self.end is None or stamp < self.end:
+            return self.start - self.before
+        return stamp - self.total
+
+
+class FrameScheduler:
+    def __init__(self, root, step, render, tick_ms=TICK_MS, max_steps=5, clock=time.perf_counter):
+        self.root = root
+        self.clock = clock
+        self.step = step
+        self.render = render
+        self.tick = tick_ms / 1000
+        self.max_steps = max_steps
+        self.running = False
+        self.after_id = None
+        self.last = 0.0
+        self.accumulator = 0.0
+        self.tick_end = 0.0
+        self.dropped_steps = 0
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.last = self.clock()
+        self.accumulator = 0.0
+        self.after_id = self.root.after(int(self.tick * 1000), self.frame)
+
+    def stop(self):
+        self.running = False
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+            self.after_id = None
+
+    def frame(self):
+        self.after_id = None
+        if not self.running:
+            return
+        now = self.clock()
+        self.accumulator += now - self.last
+        self.last = now
+
+        steps = 0
+        while self.running and self.accumulator >= self.tick and steps < self.max_steps:
+            self.accumulator -= self.tick
+            self.tick_end = now - self.accumulator
+            steps += 1
+            if not self.step():
+                self.running = False
+        if self.accumulator >= self.tick:
+            self.dropped_steps += int(self.accumulator / self.tick)
+            self.accumulator %= self.tick
+
+        if steps:
+            self.render()
+        if self.running:
+            delay = max(1, int((self.tick - self.accumulator) * 1000))
+            self.after_id = self.root.after(delay, self.frame)
@@ -0,0 +1,213 @@
+import threading
+import time
+from collections import deque
+from copy import copy
+
+from autopilot import key_changes
+from balls import DIAMETER
+from constants import TICK_MS
+from engine import Rect
+from profiler import FrameProfiler
+from replay import InputState, InputQueue, LEFT_DOWN, RIGHT_DOWN
+from scheduler import IdleTime
+
+BRICK_EVENTS = {"level", "brick_added", "brick_removed", "bricks_moved", "bricks_recolored"}
+
+
+class BallBoxes:
+    __slots__ = ("ids", "x", "y")
+
+    def __init__(self, store):
+        n = len(store)
+        self.ids = store.ids[:n]
+        self.x = store.x[:n]
+        self.y = store.y[:n]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def boxes(self):
+        for ball_id, x, y in zip(self.ids, self.x, self.y):
+            yield ball_id, x, y, x + DIAMETER, y + DIAMETER
+
+
+class Snapshot:
+    __slots__ = (
+        "ticks", "board", "score", "highscore", "lives", "running", "paused", "effects", "active_effect", "flipped",
+        "darkness", "max_effects", "paddle", "bricks", "ball", "ball_color", "balls", "split_paddles", "gun_bullets",
+        "events", "probes"
+    )
+
+    def __init__(self, world, events, probes, bricks=None):
+        self.ticks = world.ticks
+        self.board = world.board
+        self.score = world.score
+        self.highscore = world.highscore
+        self.lives = world.lives
+        self.running = world.running
+        self.paused = world.paused
+        self.effects = tuple(world.effects)
+        self.active_effect = world.active_effect
+        self.flipped = world.flipped
+        self.darkness = world.darkness
+        self.max_effects = world.max_effects
+        self.paddle = copy(world.paddle)
+        self.bricks = bricks if bricks is not None else tuple(copy(brick) for brick in world.bricks)
+        self.ball = world.ball
+        self.ball_color = world.ball_color
+        self.balls = BallBoxes(world.balls)
+        self.split_paddles = tuple(copy(paddle) for paddle in world.split_paddles)
+        self.gun_bullets = {bullet_id: copy(bullet) for bullet_id, bullet in world.gun_bullets.items()}
+        self.events = [tuple(copy(arg) if isinstance(arg, Rect) else arg for arg in event) for event in events]
+        self.probes = probes
+
+
+class SnapshotBuffer:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.front = None
+        self.published = 0
+        self.dropped = 0
+
+    def publish(self, snapshot):
+        with self.lock:
+            front = self.front
+            if front is not None:
+                snapshot.events[:0] = front.events
+                snapshot.probes[:0] = front.probes
+                self.dropped += 1
+            self.front = snapshot
+            self.published += 1
+
+    def take(self):
+        with self.lock:
+            snapshot, self.front = self.front, None
+        return snapshot
+
+
+class SimulationThread:
+    def __init__(self, world, recording=None, spectators=None, autopilot=None, tick_ms=TICK_MS, max_steps=5,
+                 clock=time.perf_counter):
+        self.world = world
+        self.recording = recording
+        self.spectators = spectators
+        self.autopilot = autopilot
+        self.tick = tick_ms / 1000
+        self.max_steps = max_steps
+        self.clock = clock
+        self.input_state = InputState()
+        self.input_queue = InputQueue(self.tick)
+        self.idle = IdleTime()
+        self.commands = deque()
+        self.profiler = FrameProfiler()
+        world.profiler = self.profiler
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.buffer = SnapshotBuffer()
+        self.bricks = None
+        self.probes = []
+        self.dropped_steps = 0
+        self.running = False
+        self.thread = None
+        self.error = None
+        self.publish()
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="simulation", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self.wake.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def send(self, code, value=0):
+        self.commands.append((code, value))
+        self.wake.set()
+
+    def push_key(self, stamp, code):
+        self.input_queue.push(stamp, code)
+
+    def apply(self, code, value=0):
+        if self.recording:
+            self.recording.record(self.world.ticks, code, value)
+        self.input_state.apply(self.world, code, value)
+        self.idle.update(self.world.running and not self.world.paused, self.clock())
+
+    def run(self):
+        try:
+            self.loop()
+        except Exception as error:
+            self.error = error
+            self.running = False
+
+    def loop(self):
+        world = self.world
+        next_tick = self.clock() + self.tick
+        while self.running:
+            self.wake.clear()
+            with self.lock:
+                changed = bool(self.commands)
+                while self.commands:
+                    self.apply(*self.commands.popleft())
+                if changed:
+                    self.publish()
+            if not world.running or world.paused:
+                self.wake.wait()
+                next_tick = self.clock() + self.tick
+                continue
+            now = self.clock()
+            if now < next_tick:
+                self.wake.wait(next_tick - now)
+                continue
+            with self.lock:
+                steps = 0
+                while now >= next_tick and steps < self.max_steps and world.running and not world.paused:
+                    self.step(next_tick)
+                    next_tick += self.tick
+                    steps += 1
+                if now >= next_tick and world.running and not world.paused:
+                    behind = int((now - next_tick) / self.tick) + 1
+                    self.dropped_steps += behind
+                    next_tick += behind * self.tick
+                self.publish()
+
+    def step(self, tick_end):
+        profiler = self.profiler
+        profiler.begin_frame()
+        for stamp, code, offset in self.input_queue.due(tick_end):
+            if code in (LEFT_DOWN, RIGHT_DOWN):
+                direction = -1 if code == LEFT_DOWN else 1
+                self.probes.append((self.idle.active(stamp), -direction if self.world.reverse_controls else direction))
+            self.apply(code, offset)
+        if self.autopilot:
+            for code in key_changes(self.input_state, self.autopilot.inputs(self.world)):
+                self.apply(code)
+        self.world.step(self.input_state.inputs())
+        if not self.world.running:
+            self.idle.update(False, tick_end)
+        profiler.end_frame(self.world.active_effect)
+
+    def publish(self):
+        world = self.world
+        events = world.drain_events()
+        if self.bricks is None or any(event[0] in BRICK_EVENTS for event in events):
+            self.bricks = tuple(copy(brick) for brick in world.bricks)
+        self.buffer.publish(Snapshot(world, events, self.probes, self.bricks))
+        self.probes = []
+        if self.spectators:
+            self.spectators.publish(world)
+
+    def overlay_text(self):
+        with self.lock:
+            text = self.profiler.overlay_text()
+        return (f"simulation thread: {self.buffer.dropped} frames skipped by the renderer, "
+                f"{self.dropped_steps} ticks dropped\n{text}")
+
+    def export_profile(self, prefix):
+        with self.lock:
+            self.profiler.export_json(f"{prefix}.json")
+            self.profiler.export_csv(f"{prefix}.csv")
@@ -0,0 +1,226 @@
+import argparse
+import gc
+import random
+import sys
+import time
+from array import array
+from collections import Counter
+
+from autopilot import Autopilot
+from engine import World, Inputs
+from replay import CHAOS_CHANCE, BALL_SPEED
+
+WARMUP = 0.1
+SLACK = 0.1
+MIN_SLACK = 16
+WINDOWS = 4
+BOUNDED = {"profiler windows", "objects Window"}
+MAX_GAME_TICKS = 20000
+
+
+def world_counts(world):
+    return {
+        "world timers": len(world.timers),
+        "world timer heap": len(world.timers.heap),
+        "world effects": len(world.effects),
+        "world effect timers": sum(len(timers) for timers in world.effects.values()),
+        "world balls": len(world.balls),
+        "world bullets": len(world.gun_bullets),
+        "world split paddles": len(world.split_paddles),
+        "world bricks": len(world.bricks),
+        "world events": len(world.events)
+    }
+
+
+def object_counts():
+    gc.collect()
+    counts = {f"objects {name}": count
+              for name, count in Counter(type(obj).__qualname__ for obj in gc.get_objects()).items()}
+    counts["python blocks"] = sys.getallocatedblocks()
+    return counts
+
+
+def canvas_counts(canvas):
+    counts = Counter()
+    for item in canvas.find_all():
+        state = canvas.itemcget(item, "state") or "normal"
+        counts[f"canvas {canvas.type(item)} {state}"] += 1
+    return counts
+
+
+def app_counts(app):
+    counts = {
+        "tk after callbacks": len(app.root.tk.splitlist(app.root.tk.call("after", "info"))),
+        "pool items": sum(pool.created for pool in app.pools),
+        "pool idle": sum(len(pool.free) for pool in app.pools),
+        "batch items": len(app.draw.applied_coords) + len(app.draw.applied_options),
+        "pending events": len(app.pending_events),
+        "queued keys": len(app.input_queue.events),
+        "latency probes": len(app.latency_probes),
+        "profiler windows": len(app.profiler.samples)
+    }
+    for name in ("brick_items", "ball_items", "bullet_items", "split_items"):
+        counts[f"app {name}"] = len(getattr(app, name))
+    counts.update(canvas_counts(app.canvas))
+    counts.update(world_counts(app.world))
+    return counts
+
+
+class ResourceMonitor:
+    def __init__(self, *sources):
+        self.sources = sources
+        self.series = {}
+        self.count = 0
+
+    def sample(self):
+        counts = {}
+        for source in self.sources:
+            counts.update(source())
+        for key, value in counts.items():
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = array("q", bytes(8 * self.count))
+            series.append(value)
+        self.count += 1
+        for series in self.series.values():
+            if len(series) < self.count:
+                series.append(0)
+        return counts
+
+    def leaks(self, warmup=WARMUP, slack=SLACK, min_slack=MIN_SLACK, windows=WINDOWS):
+        start = int(self.count * warmup)
+        size = (self.count - start) // windows
+        if size == 0:
+            return []
+        leaks = []
+        for key, series in sorted(self.series.items()):
+            if key in BOUNDED:
+                continue
+            peaks = [max(series[start + i * size:start + (i + 1) * size]) for i in range(windows)]
+            first, last = peaks[0], peaks[-1]
+            rising = all(a < b for a, b in zip(peaks, peaks[1:]))
+            if rising and last > first + max(min_slack, first * slack):
+                leaks.append((key, first, last))
+        return leaks
+
+    def report(self, limit=12):
+        start = int(self.count * WARMUP)
+        series = self.series
+        growth = sorted(series, key=lambda key: series[key][-1] - series[key][start], reverse=True)
+        lines = [f"{'resource':<36}{'after warmup':>14}{'final':>10}"]
+        for key in growth[:limit]:
+            lines.append(f"{key:<36}{series[key][start]:>14}{series[key][-1]:>10}")
+        return "\n".join(lines)
+
+
+class Player:
+    def __init__(self, rng):
+        self.rng = rng
+        self.distracted = 0
+        self.autopilot = Autopilot()
+
+    def inputs(self, world):
+        if self.distracted:
+            self.distracted -= 1
+            return Inputs()
+        if self.rng.random() < 0.01:
+            self.distracted = self.rng.randint(20, 120)
+        return self.autopilot.inputs(world)
+
+
+def soak_world(games, seed, sample_every):
+    rng = random.Random(seed)
+    world = World(seed)
+    player = Player(rng)
+    monitor = ResourceMonitor(lambda: world_counts(world), object_counts)
+    ticks = 0
+    for game in range(games):
+        world.set_chaos_chance(rng.random())
+        world.set_ball_speed(rng.randint(5, 12))
+        world.set_mega_chaos(rng.random() < 0.25)
+        start = world.ticks
+        while world.running and world.ticks - start < MAX_GAME_TICKS:
+            world.step(player.inputs(world))
+            if rng.random() < 0.001:
+                world.toggle_pause()
+                world.toggle_pause()
+        ticks += world.ticks - start
+        world.restart()
+        if game % sample_every == 0:
+            monitor.sample()
+    return monitor, ticks
+
+
+def soak_tk(games, seed, sample_every, speedup):
+    import tkinter as tk
+    from main import ChaosBreakout
+
+    root = tk.Tk()
+    app = ChaosBreakout(root, seed)
+    scheduler = app.scheduler
+    real_clock = scheduler.clock
+    origin = real_clock()
+    scheduler.clock = lambda: origin + (real_clock() - origin) * speedup
+    scheduler.max_steps = speedup
+    rng = random.Random(seed)
+    player = Player(rng)
+    monitor = ResourceMonitor(lambda: app_counts(app), object_counts)
+    state = {"games": 0, "ticks": 0, "start": 0}
+
+    def direct():
+        world = app.world
+        if not world.running or world.ticks - state["start"] >= MAX_GAME_TICKS:
+            state["ticks"] += world.ticks - state["start"]
+            if state["games"] % sample_every == 0:
+                monitor.sample()
+            state["games"] += 1
+            if state["games"] >= games:
+                root.quit()
+                return
+            app.apply_input(CHAOS_CHANCE, rng.randrange(101))
+            app.apply_input(BALL_SPEED, rng.randint(5, 12))
+            if rng.random() < 0.25:
+                app.toggle_mega_chaos()
+            app.restart_game()
+            state["start"] = app.world.ticks
+        else:
+            inputs = player.inputs(world)
+            app.set_key("left", inputs.left)
+            app.set_key("right", inputs.right)
+            if rng.random() < 0.01:
+                app.toggle_pause()
+                app.toggle_pause()
+        root.after(16, direct)
+
+    root.after(16, direct)
+    root.mainloop()
+    app.close()
+    return monitor, state["ticks"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play many accelerated ChaosBreakout games and fail on resource growth")
+    parser.add_argument("--games", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sample-every", type=int, default=5, help="sample resource counts every N games")
+    parser.add_argument("--tk", action="store_true", help="soak the Tk front-end instead of the headless world")
+    parser.add_argument("--speedup", type=int, default=50, help="simulated ticks per real tick in --tk mode")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.tk:
+        monitor, ticks = soak_tk(args.games, args.seed, args.sample_every, args.speedup)
+    else:
+        monitor, ticks = soak_world(args.games, args.seed, args.sample_every)
+    elapsed = time.perf_counter() - start
+    print(f"{args.games} games, {ticks} ticks in {elapsed:.1f}s ({ticks / elapsed:.0f} ticks/s), "
+          f"{monitor.count} samples")
+    print(monitor.report())
+    leaks = monitor.leaks()
+    for key, before, after in leaks:
+        print(f"LEAK {key}: peak rose in every window, from {before} to {after}")
+    return 1 if leaks else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
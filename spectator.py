@@ -0,0 +1,408 @@
+import argparse
+import asyncio
+import socket
+import struct
+import sys
+import threading
+import time
+from array import array
+from collections import namedtuple
+
+from balls import DIAMETER
+from batch import CanvasBatch
+from constants import WINDOW_WIDTH, WINDOW_HEIGHT, PASTEL_COLORS, CHAOS_EVENTS
+from pool import ItemPool
+from view import View
+
+PORT = 8765
+
+SNAPSHOT = 1
+DELTA = 2
+
+STATUS = 1
+EFFECTS = 2
+PADDLE = 4
+BRICKS = 8
+BALLS = 16
+SPLIT = 32
+BULLETS = 64
+BOARD = 128
+
+RUNNING = 1
+PAUSED = 2
+FLIPPED = 4
+DARKNESS = 8
+PADDLE_HIDDEN = 16
+
+NO_MAIN = 0xFFFFFFFF
+
+FRAME = struct.Struct("<IB")
+BODY = struct.Struct("<IB")
+STATUS_FIELDS = struct.Struct("<IIi")
+EFFECT_FIELDS = struct.Struct("<HB")
+RECT = struct.Struct("<4f")
+BRICK = struct.Struct("<I4hB")
+COUNT = struct.Struct("<H")
+BALL_HEADER = struct.Struct("<II")
+SIZE = struct.Struct("<HH")
+
+COLOR_INDEX = {color: i for i, color in enumerate(PASTEL_COLORS)}
+EFFECT_BITS = {effect: 1 << i for i, effect in enumerate(CHAOS_EVENTS)}
+
+State = namedtuple("State", "tick status effects paddle bricks balls split bullets board")
+
+
+def capture(world):
+    flags = (RUNNING * world.running | PAUSED * world.paused | FLIPPED * world.flipped |
+             DARKNESS * world.darkness | PADDLE_HIDDEN * world.paddle.hidden)
+    effects = sum(EFFECT_BITS[effect] for effect in world.effects)
+    bricks = {brick.id: (round(brick.x1), round(brick.y1), round(brick.x2), round(brick.y2), COLOR_INDEX[brick.color])
+              for brick in world.bricks}
+    store = world.balls
+    n = len(store)
+    main = store.index(world.ball) if world.ball in store.ids else NO_MAIN
+    balls = (n, main, array("f", store.x[:n]).tobytes(), array("f", store.y[:n]).tobytes())
+    return State(
+        world.ticks,
+        (world.score, world.highscore, world.lives),
+        (effects, flags),
+        world.paddle.coords(),
+        bricks,
+        balls,
+        tuple(paddle.coords() for paddle in world.split_paddles),
+        tuple(bullet.coords() for bullet in world.gun_bullets.values()),
+        (world.board.width, world.board.height)
+    )
+
+
+def encode(old, new):
+    sections = 0
+    parts = []
+    if old is None or old.status != new.status:
+        sections |= STATUS
+        parts.append(STATUS_FIELDS.pack(*new.status))
+    if old is None or old.effects != new.effects:
+        sections |= EFFECTS
+        parts.append(EFFECT_FIELDS.pack(*new.effects))
+    if old is None or old.paddle != new.paddle:
+        sections |= PADDLE
+        parts.append(RECT.pack(*new.paddle))
+    if old is None or old.bricks is not new.bricks and old.bricks != new.bricks:
+        sections |= BRICKS
+        previous = old.bricks if old else {}
+        removed = [brick_id for brick_id in previous if brick_id not in new.bricks]
+        changed = [(brick_id, brick) for brick_id, brick in new.bricks.items() if previous.get(brick_id) != brick]
+        parts.append(COUNT.pack(len(removed)))
+        parts.append(struct.pack(f"<{len(removed)}I", *removed))
+        parts.append(COUNT.pack(len(changed)))
+        parts.extend(BRICK.pack(brick_id, *brick) for brick_id, brick in changed)
+    if old is None or old.balls != new.balls:
+        sections |= BALLS
+        count, main, xs, ys = new.balls
+        parts.append(BALL_HEADER.pack(count, main) + xs + ys)
+    for flag, rects in ((SPLIT, "split"), (BULLETS, "bullets")):
+        value = getattr(new, rects)
+        if old is None or getattr(old, rects) != value:
+            sections |= flag
+            parts.append(COUNT.pack(len(value)))
+            parts.extend(RECT.pack(*rect) for rect in value)
+    if old is None or old.board != new.board:
+        sections |= BOARD
+        parts.append(SIZE.pack(*new.board))
+    body = BODY.pack(new.tick, sections) + b"".join(parts)
+    return FRAME.pack(len(body), SNAPSHOT if old is None else DELTA) + body
+
+
+class Mirror:
+    def __init__(self):
+        self.tick = 0
+        self.score = self.highscore = self.lives = 0
+        self.effects = 0
+        self.flags = 0
+        self.paddle = (0, 0, 0, 0)
+        self.bricks = {}
+        self.main = NO_MAIN
+        self.xs = array("f")
+        self.ys = array("f")
+        self.split = []
+        self.bullets = []
+        self.size = (WINDOW_WIDTH, WINDOW_HEIGHT)
+        self.messages = 0
+        self.bytes = 0
+
+    def apply(self, body):
+        self.messages += 1
+        self.bytes += len(body) + FRAME.size
+        self.tick, sections = BODY.unpack_from(body)
+        pos = BODY.size
+        if sections & STATUS:
+            self.score, self.highscore, self.lives = STATUS_FIELDS.unpack_from(body, pos)
+            pos += STATUS_FIELDS.size
+        if sections & EFFECTS:
+            self.effects, self.flags = EFFECT_FIELDS.unpack_from(body, pos)
+            pos += EFFECT_FIELDS.size
+        if sections & PADDLE:
+            self.paddle = RECT.unpack_from(body, pos)
+            pos += RECT.size
+        if sections & BRICKS:
+            removed, = COUNT.unpack_from(body, pos)
+            pos += COUNT.size
+            for brick_id in struct.unpack_from(f"<{removed}I", body, pos):
+                del self.bricks[brick_id]
+            pos += 4 * removed
+            changed, = COUNT.unpack_from(body, pos)
+            pos += COUNT.size
+            for _ in range(changed):
+                brick_id, *brick = BRICK.unpack_from(body, pos)
+                self.bricks[brick_id] = brick
+                pos += BRICK.size
+        if sections & BALLS:
+            count, self.main = BALL_HEADER.unpack_from(body, pos)
+            pos += BALL_HEADER.size
+            self.xs = array("f", body[pos:pos + 4 * count])
+            self.ys = array("f", body[pos + 4 * count:pos + 8 * count])
+            pos += 8 * count
+        for flag, name in ((SPLIT, "split"), (BULLETS, "bullets")):
+            if sections & flag:
+                count, = COUNT.unpack_from(body, pos)
+                pos += COUNT.size
+                setattr(self, name, [RECT.unpack_from(body, pos + i * RECT.size) for i in range(count)])
+                pos += count * RECT.size
+        if sections & BOARD:
+            self.size = SIZE.unpack_from(body, pos)
+            pos += SIZE.size
+
+    def active_effects(self):
+        return [effect for effect, bit in EFFECT_BITS.items() if self.effects & bit]
+
+
+class SpectatorServer:
+    def __init__(self, host="127.0.0.1", port=PORT):
+        self.host = host
+        self.port = port
+        self.state = None
+        self.clients = {}
+        self.loop = None
+        self.server = None
+        self.thread = None
+        self.error = None
+        self.ready = threading.Event()
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name="spectator", daemon=True)
+        self.thread.start()
+        self.ready.wait()
+        if self.error is not None:
+            raise self.error
+
+    def run(self):
+        loop = asyncio.new_event_loop()
+        try:
+            self.server = loop.run_until_complete(asyncio.start_server(self.handle, self.host, self.port))
+        except OSError as error:
+            self.error = error
+            self.ready.set()
+            loop.close()
+            return
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.loop = loop
+        self.ready.set()
+        loop.run_forever()
+        loop.close()
+
+    def stop(self):
+        if self.loop is not None:
+            asyncio.run_coroutine_threadsafe(self.shutdown(), self.loop).result(timeout=1)
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(timeout=1)
+            self.loop = None
+
+    async def shutdown(self):
+        self.server.close()
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def publish(self, world):
+        if self.loop is not None and self.clients:
+            self.loop.call_soon_threadsafe(self.update, capture(world))
+
+    def update(self, state):
+        self.state = state
+        for wake in self.clients.values():
+            wake.set()
+
+    async def handle(self, reader, writer):
+        wake = asyncio.Event()
+        self.clients[writer] = wake
+        if self.state is not None:
+            wake.set()
+        sent = None
+        try:
+            while True:
+                await wake.wait()
+                wake.clear()
+                state = self.state
+                writer.write(encode(sent, state))
+                await writer.drain()
+                sent = state
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            del self.clients[writer]
+            writer.close()
+
+
+class SpectatorClient:
+    def __init__(self, host, port):
+        self.mirror = Mirror()
+        self.lock = threading.Lock()
+        self.sock = socket.create_connection((host, port))
+        self.connected = True
+        self.thread = threading.Thread(target=self.receive, name="spectator-client", daemon=True)
+        self.thread.start()
+
+    def read_exact(self, size):
+        data = bytearray()
+        while len(data) < size:
+            chunk = self.sock.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("spectator server closed the connection")
+            data += chunk
+        return bytes(data)
+
+    def receive(self):
+        try:
+            while True:
+                size, kind = FRAME.unpack(self.read_exact(FRAME.size))
+                body = self.read_exact(size)
+                with self.lock:
+                    if kind == SNAPSHOT:
+                        self.mirror = Mirror()
+                    self.mirror.apply(body)
+        except (ConnectionError, OSError):
+            self.connected = False
+
+    def close(self):
+        self.sock.close()
+
+
+class Viewer:
+    def __init__(self, root, canvas, client):
+        self.root = root
+        self.client = client
+        self.canvas = canvas
+        self.size = (WINDOW_WIDTH, WINDOW_HEIGHT)
+        self.draw = CanvasBatch(canvas)
+        self.dark = False
+        self.view = View()
+        self.brick_items = {}
+        self.brick_pool = ItemPool(self.draw, "rectangle", outline="#444", width=1, tags="brick")
+        self.ball_pool = ItemPool(self.draw, "oval", fill="#ffffff", outline="", width=0)
+        self.rect_pool = ItemPool(self.draw, "rectangle", fill="#fff", outline="")
+        self.ball_items = []
+        self.rect_items = []
+        self.paddle = self.draw.create_rectangle(0, 0, 0, 0, fill="#ffffff", outline="", width=0)
+        self.dark_overlay = self.draw.create_rectangle(0, 0, WINDOW_WIDTH, WINDOW_HEIGHT, fill="black",
+                                                       stipple="gray50", state="hidden")
+        self.status = self.draw.create_text(WINDOW_WIDTH // 2, 12, fill="#888888", font=("Segoe UI", 10, "italic"))
+        self.frame()
+
+    def frame(self):
+        with self.client.lock:
+            self.render(self.client.mirror)
+        self.draw.flush()
+        self.root.after(16, self.frame)
+
+    def resize(self, size):
+        width, height = self.size = size
+        self.canvas.config(width=width, height=height)
+        self.draw.coords(self.dark_overlay, 0, 0, width, height)
+        self.view.height = height
+
+    def render(self, mirror):
+        if mirror.size != self.size:
+            self.resize(mirror.size)
+        view = self.view
+        view.flipped = bool(mirror.flags & FLIPPED)
+        stale = set(self.brick_items)
+        for brick_id, (*rect, color) in mirror.bricks.items():
+            x1, y1, x2, y2 = view.rect(*rect)
+            item = self.brick_items.get(brick_id)
+            if item is None:
+                self.brick_items[brick_id] = self.brick_pool.acquire(x1, y1, x2, y2, fill=PASTEL_COLORS[color])
+            else:
+                stale.discard(brick_id)
+                self.draw.coords(item, x1, y1, x2, y2)
+                self.draw.itemconfig(item, fill=PASTEL_COLORS[color])
+        for brick_id in stale:
+            self.brick_pool.release(self.brick_items.pop(brick_id))
+
+        self.draw.coords(self.paddle, *view.rect(*mirror.paddle))
+        self.draw.itemconfig(self.paddle, state="hidden" if mirror.flags & PADDLE_HIDDEN else "normal")
+
+        balls = list(zip(mirror.xs, mirror.ys))
+        while len(self.ball_items) < len(balls):
+            self.ball_items.append(self.ball_pool.acquire(0, 0, 0, 0))
+        while len(self.ball_items) > len(balls):
+            self.ball_pool.release(self.ball_items.pop())
+        ghost = mirror.effects & EFFECT_BITS["ghostball"]
+        for i, (item, (x, y)) in enumerate(zip(self.ball_items, balls)):
+            self.draw.coords(item, *view.rect(x, y, x + DIAMETER, y + DIAMETER))
+            self.draw.itemconfig(item, fill="#cccccc" if ghost and i == mirror.main else "#ffffff")
+
+        rects = [(rect, "#fff") for rect in mirror.split] + [(rect, "red") for rect in mirror.bullets]
+        while len(self.rect_items) < len(rects):
+            self.rect_items.append(self.rect_pool.acquire(0, 0, 0, 0))
+        while len(self.rect_items) > len(rects):
+            self.rect_pool.release(self.rect_items.pop())
+        for item, (rect, fill) in zip(self.rect_items, rects):
+            self.draw.coords(item, *view.rect(*rect))
+            self.draw.itemconfig(item, fill=fill)
+
+        dark = bool(mirror.flags & DARKNESS)
+        if dark != self.dark:
+            self.dark = dark
+            self.draw.itemconfig(self.dark_overlay, state="normal" if dark else "hidden")
+            self.draw.tag_raise(self.dark_overlay)
+            self.draw.tag_raise(self.status)
+        effects = ", ".join(mirror.active_effects()) or "no chaos"
+        state = "" if mirror.flags & RUNNING else "  GAME OVER"
+        self.draw.itemconfig(self.status, text=f"score {mirror.score}  lives {mirror.lives}  {effects}{state}")
+        self.draw.coords(self.status, self.size[0] // 2, view.y(12))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Watch a ChaosBreakout game started with main.py --spectate")
+    parser.add_argument("address", nargs="?", default=f"127.0.0.1:{PORT}", help="HOST:PORT of the game")
+    parser.add_argument("--stats", type=float, metavar="SECONDS",
+                        help="print stream statistics for this long instead of opening a window")
+    args = parser.parse_args(argv)
+
+    host, _, port = args.address.rpartition(":")
+    client = SpectatorClient(host or "127.0.0.1", int(port))
+    if args.stats:
+        start = time.perf_counter()
+        time.sleep(args.stats)
+        elapsed = time.perf_counter() - start
+        mirror = client.mirror
+        print(f"tick {mirror.tick}: score {mirror.score}, {len(mirror.bricks)} bricks, {len(mirror.xs)} balls")
+        print(f"{mirror.messages} messages, {mirror.bytes} bytes ({mirror.bytes / elapsed / 1024:.1f} KiB/s)")
+        client.close()
+        return 0
+
+    import tkinter as tk
+    root = tk.Tk()
+    root.title("ChaosBreakout spectator")
+    root.resizable(False, False)
+    canvas = tk.Canvas(root, width=WINDOW_WIDTH, height=WINDOW_HEIGHT, bg="#1e1e1e", highlightthickness=0)
+    canvas.pack()
+    Viewer(root, canvas, client)
+    root.mainloop()
+    client.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
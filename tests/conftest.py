@@ -0,0 +1,17 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine import Inputs
+
+
+def idle(world):
+    return Inputs()
+
+
+def play_until_over(world, player=idle, max_ticks=20000):
+    events = []
+    while world.running and world.ticks < max_ticks:
+        events.extend(kind for kind, *_ in world.step(player(world)))
+    return events
@@ -0,0 +1,56 @@
+import pytest
+
+from autopilot import Autopilot, predict, key_changes, play
+from balls import DIAMETER, BALL_RADIUS
+from bench import scripted_paddle
+from conftest import play_until_over
+from engine import World, Inputs
+from replay import InputState, LEFT_DOWN, LEFT_UP, RIGHT_DOWN
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_prediction_matches_the_landing(seed):
+    world = World(seed)
+    world.chaos_chance = 0
+    for _ in range(30):
+        world.step(Inputs())
+    store = world.balls
+    i = store.index(world.ball)
+    plane = world.paddle.y1 - DIAMETER
+    prediction = predict(world, world.ticks, store.x[i], store.y[i], store.dx[i], store.dy[i], plane)
+    while not (store.y[i] >= plane and store.dy[i] > 0):
+        world.step(Inputs())
+        i = store.index(world.ball)
+    assert prediction.land_tick <= world.ticks < prediction.land_tick + 1
+    assert abs(store.x[i] + BALL_RADIUS - prediction.x) <= world.ball_speed
+
+
+def test_predictions_are_reused_between_bounces():
+    pilot = Autopilot()
+    world, _ = play(3, pilot.inputs, 3000)
+    assert pilot.decisions == world.ticks
+    assert pilot.traces < world.ticks / 10
+
+
+def test_outplays_the_scripted_paddle():
+    pilot_lost = scripted_lost = 0
+    for seed in range(4):
+        world, _ = play(seed, Autopilot().inputs, 4000)
+        pilot_lost += 3 - world.lives
+        world, _ = play(seed, scripted_paddle, 4000)
+        scripted_lost += 3 - world.lives
+    assert pilot_lost < scripted_lost
+
+
+def test_finished_world():
+    world = World(0)
+    play_until_over(world)
+    assert Autopilot().inputs(world) in (Inputs(), Inputs(left=True), Inputs(right=True))
+
+
+def test_key_changes():
+    state = InputState()
+    assert list(key_changes(state, Inputs(left=True))) == [LEFT_DOWN]
+    state.left = True
+    assert list(key_changes(state, Inputs(right=True))) == [LEFT_UP, RIGHT_DOWN]
+    assert list(key_changes(state, Inputs(left=True))) == []
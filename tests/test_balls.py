@@ -0,0 +1,87 @@
+import pytest
+
+from balls import DIAMETER, FREE, STORM_BALLS, sweep_box
+from bench import scripted_paddle, force_chaos, multiball_storm
+from engine import World, Inputs, Brick
+from levels import ORIGIN_X, ORIGIN_Y
+from grid import BrickGrid
+
+
+def overlaps(box, brick):
+    _, x1, y1, x2, y2 = box
+    return x1 < brick.x2 and x2 > brick.x1 and y1 < brick.y2 and y2 > brick.y1
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_fast_confused_balls_never_tunnel_into_bricks(seed):
+    world = World(seed)
+    world.chaos_chance = 0
+    world.lives = 10 ** 6
+    world.set_ball_speed(20)
+    force_chaos(world, "confusion")
+    hits = 0
+    for _ in range(1500):
+        hits += sum(kind == "brick_removed" for kind, *_ in world.step(scripted_paddle(world)))
+        for box in world.balls.boxes():
+            assert not any(overlaps(box, brick) for brick in world.bricks.query(*box[1:]))
+    assert hits
+
+
+def target_brick(world, x1, y1, x2, y2):
+    board = world.board
+    world.bricks = BrickGrid(board.brick_width, board.brick_height, ORIGIN_X, ORIGIN_Y)
+    brick = Brick(world.new_id(), x1, y1, x2, y2, "#ffffff")
+    world.bricks.add(brick)
+    world.bricks.add(Brick(world.new_id(), ORIGIN_X, ORIGIN_Y, ORIGIN_X + 50, ORIGIN_Y + 18, "#ffffff"))
+    return brick
+
+
+def place_main_ball(world, x, y, dx, dy):
+    store = world.balls
+    i = store.index(world.ball)
+    store.x[i], store.y[i], store.dx[i], store.dy[i] = x, y, dx, dy
+    return i
+
+
+def test_corner_hit_flips_both_axes():
+    world = World(0)
+    world.chaos_chance = 0
+    brick = target_brick(world, 300, 100, 350, 118)
+    i = place_main_ball(world, brick.x1 - DIAMETER - 2.5, brick.y2 + 2.5, 5, -5)
+    events = world.step(Inputs())
+    assert ("brick_removed", brick) in events
+    assert (world.balls.dx[i], world.balls.dy[i]) == (-5, 5)
+
+
+def test_side_hit_flips_only_dx():
+    world = World(0)
+    world.chaos_chance = 0
+    brick = target_brick(world, 300, 100, 350, 118)
+    i = place_main_ball(world, brick.x1 - DIAMETER - 2.5, brick.y1 + 2, 5, -1)
+    world.step(Inputs())
+    assert (world.balls.dx[i], world.balls.dy[i]) == (-5, -1)
+
+
+def test_sweep_box_reports_entry_time_and_axis():
+    assert sweep_box(0, 0, 10, 0, 5 + DIAMETER, -5, 30 + DIAMETER, 20) == (0.5, True, False)
+    assert sweep_box(0, 0, 10, 0, 5 + DIAMETER, 50, 30 + DIAMETER, 60) is None
+
+
+@pytest.mark.parametrize("classify", ["classify_python", "classify_numpy"])
+def test_broad_phase_never_frees_a_ball_that_would_hit(classify):
+    if classify == "classify_numpy":
+        pytest.importorskip("numpy")
+    world, refill = multiball_storm(1)
+    store = world.balls
+    free = 0
+    for tick in range(120):
+        refill(tick)
+        world.step(scripted_paddle(world))
+        results = getattr(store, classify)(world, len(store))
+        free += results.count(FREE)
+        paddles = store.paddles(world)
+        for i, result in enumerate(results):
+            if result == FREE:
+                hit = store.first_hit(world, store.x[i], store.y[i], store.dx[i], store.dy[i], paddles)
+                assert hit[1] is None
+    assert free > 120 * STORM_BALLS // 2
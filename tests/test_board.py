@@ -0,0 +1,38 @@
+import random
+
+import pytest
+
+from bench import scripted_paddle
+from engine import World
+from levels import DEFAULT_BOARD, Board, layout_bricks, generate_layout
+
+
+def test_endless_game_keeps_bricks_above_the_floor():
+    board = Board(820, 640, 6, 14)
+    world = World(11, board=board, endless=True)
+    world.lives = 10 ** 6
+    removed = 0
+    for _ in range(3000):
+        removed += sum(kind == "brick_removed" for kind, *_ in world.step(scripted_paddle(world)))
+    assert world.bricks
+    assert all(brick.y2 <= board.brick_floor + board.brick_height for brick in world.bricks)
+    assert all(brick.x2 <= board.width for brick in world.bricks)
+    assert world.top_row < 0 and removed
+
+
+def test_layout_fills_a_custom_grid():
+    board = Board(900, 700, 7, 16)
+    bricks = list(layout_bricks(generate_layout(random.Random(2), 0, board), board))
+    assert bricks
+    assert max(x2 for _, _, x2, _, _ in bricks) <= board.width
+    assert max(y2 for _, _, _, y2, _ in bricks) <= board.brick_floor
+
+
+@pytest.mark.parametrize("board", [Board(700, 500, 5, 700), Board(300, 200), Board(50, 500, 1, 1)])
+def test_unplayable_boards_are_rejected(board):
+    with pytest.raises(ValueError):
+        board.validate()
+
+
+def test_default_board_is_valid():
+    assert DEFAULT_BOARD.validate() is DEFAULT_BOARD
@@ -0,0 +1,112 @@
+from bench import scripted_paddle
+from constants import PADDLE_WIDTH
+from effects import EFFECTS
+from engine import World, Inputs, TICK_MS
+
+
+def calm_world(seed=0):
+    world = World(seed)
+    world.chaos_chance = 0
+    world.lives = 10 ** 6
+    return world
+
+
+def run_ms(world, ms, inputs=Inputs()):
+    for _ in range(ms // TICK_MS):
+        world.step(inputs)
+
+
+def widths(world):
+    return [paddle.x2 - paddle.x1 for paddle in [world.paddle] + world.split_paddles]
+
+
+def test_shrinkpad_replaces_bigpaddle_and_cancels_its_revert():
+    world = calm_world()
+    world.activate_chaos("bigpaddle", 1000)
+    assert widths(world) == [140]
+    world.activate_chaos("shrinkpad", 3000)
+    assert list(world.effects) == ["shrinkpad"]
+    assert widths(world) == [60]
+    run_ms(world, 1600)
+    assert widths(world) == [60]
+    run_ms(world, 1600)
+    assert not world.effects
+    assert widths(world) == [PADDLE_WIDTH]
+
+
+def test_reactivating_an_effect_restarts_its_timer():
+    world = calm_world()
+    world.activate_chaos("reverse", 1000)
+    run_ms(world, 496)
+    world.activate_chaos("reverse", 1000)
+    run_ms(world, 800)
+    assert world.reverse_controls
+    run_ms(world, 400)
+    assert not world.reverse_controls and not world.effects
+
+
+def test_bigpaddle_resizes_split_paddles_and_reverts_them():
+    world = calm_world()
+    world.activate_chaos("splitpad", 2000)
+    world.activate_chaos("bigpaddle", 1000)
+    assert widths(world) == [140, 140, 140]
+    run_ms(world, 1200)
+    assert widths(world) == [PADDLE_WIDTH] * 3
+    run_ms(world, 1000)
+    assert not world.split_paddles
+
+
+def test_invisiblepad_hides_the_paddle_after_splitpad_ends():
+    world = calm_world()
+    world.activate_chaos("splitpad", 1000)
+    world.activate_chaos("invisiblepad", 5000)
+    assert world.paddle.hidden
+    run_ms(world, 304)
+    assert world.paddle.hidden
+    run_ms(world, 800)
+    assert not world.split_paddles
+    assert not world.paddle.hidden
+    run_ms(world, 400)
+    assert world.paddle.hidden
+
+
+def test_reverting_invisiblepad_cancels_its_pending_timers():
+    world = calm_world()
+    world.activate_chaos("invisiblepad", 5000)
+    run_ms(world, 1104)
+    assert world.paddle_flash and not world.paddle.hidden
+    assert len(world.timers) == 3
+    world.expire("invisiblepad")
+    assert len(world.timers) == 0
+    run_ms(world, 2000)
+    assert not world.paddle_flash and not world.paddle.hidden
+
+
+def test_split_paddles_coast_under_slippery():
+    world = calm_world()
+    world.activate_chaos("splitpad", 5000)
+    world.activate_chaos("slippery", 1000)
+    left, right = world.split_paddles
+    run_ms(world, 160, Inputs(right=True))
+    start = left.x1, right.x1
+    run_ms(world, 160)
+    assert left.x1 > start[0] and right.x1 < start[1]
+    run_ms(world, 800)
+    assert "slippery" not in world.effects and world.slippery_velocity == 0
+    start = left.x1, right.x1
+    run_ms(world, 160)
+    assert (left.x1, right.x1) == start
+
+
+def test_mega_chaos_respects_max_effects():
+    for mega, limit in ((False, 1), (True, len(EFFECTS))):
+        world = World(4)
+        world.lives = 10 ** 6
+        world.set_mega_chaos(mega)
+        assert world.max_effects == limit
+        most = 0
+        for _ in range(6000):
+            world.step(scripted_paddle(world))
+            most = max(most, len(world.effects))
+        assert 1 <= most <= limit
+        assert most > 1 if mega else most == 1
@@ -0,0 +1,32 @@
+from bench import scripted_paddle
+from conftest import play_until_over
+from engine import World, Inputs
+
+
+def test_game_plays_to_game_over():
+    world = World(0)
+    events = play_until_over(world)
+    assert not world.running
+    assert world.lives == 0
+    assert events.count("life_lost") == 3
+    assert events[-1] == "game_over"
+    assert world.ball not in world.balls.ids
+
+    ticks = world.ticks
+    assert world.step(Inputs(right=True)) == []
+    assert world.ticks == ticks
+
+    world.restart()
+    assert world.running and world.lives == 3 and world.score == 0
+    assert world.ball in world.balls.ids
+
+
+def test_same_seed_same_game():
+    first, second = World(7), World(7)
+    for _ in range(2000):
+        first.step(scripted_paddle(first))
+        second.step(scripted_paddle(second))
+    assert (first.ticks, first.score, first.lives) == (second.ticks, second.score, second.lives)
+    assert first.paddle.coords() == second.paddle.coords()
+    assert list(first.balls.x) == list(second.balls.x)
+    assert sorted(brick.coords() for brick in first.bricks) == sorted(brick.coords() for brick in second.bricks)
@@ -0,0 +1,53 @@
+import struct
+import zlib
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from bench import force_chaos
+from engine import World, Inputs, CHAOS_EVENTS
+from framebuffer import FrameBuffer, effect_digests, png_bytes, rgb, BACKGROUND
+
+
+def test_render_finished_world():
+    world = World(0)
+    while world.running:
+        world.step(Inputs())
+    framebuffer = FrameBuffer()
+    assert framebuffer.render(world).shape == (world.board.height, world.board.width, 3)
+
+
+def test_effect_digests_with_default_arguments():
+    digests = effect_digests(0, 600)
+    assert list(digests) == list(CHAOS_EVENTS)
+    assert digests == effect_digests(0, 600)
+
+
+def test_flipped_frame_is_mirrored():
+    world = World(1)
+    framebuffer = FrameBuffer()
+    upright = framebuffer.render(world).copy()
+    force_chaos(world, "flipview")
+    assert (framebuffer.render(world) == upright[::-1]).all()
+
+
+def test_darkness_blanks_every_other_pixel():
+    world = World(1)
+    framebuffer = FrameBuffer()
+    force_chaos(world, "darkness")
+    frame = framebuffer.render(world)
+    assert not frame[0, 0].any()
+    assert (frame[0, 1] == rgb(BACKGROUND)).all()
+
+
+def test_png_round_trip():
+    pixels = np.arange(4 * 5 * 3, dtype=np.uint8).reshape(4, 5, 3)
+    data = png_bytes(pixels)
+    assert data[:8] == b"\x89PNG\r\n\x1a\n"
+    width, height = struct.unpack_from(">II", data, 16)
+    assert (width, height) == (5, 4)
+    size, = struct.unpack_from(">I", data, 33)
+    rows = np.frombuffer(zlib.decompress(data[41:41 + size]), dtype=np.uint8).reshape(4, 16)
+    assert not rows[:, 0].any()
+    assert (rows[:, 1:].reshape(4, 5, 3) == pixels).all()
@@ -0,0 +1,95 @@
+import random
+
+import pytest
+
+from engine import World
+from levels import Board
+from replay import (
+    InputState, Recording, Player, LEFT_DOWN, LEFT_UP, RIGHT_DOWN, RIGHT_UP, PAUSE, BALL_SPEED, SUBTICKS
+)
+
+
+def record_session(seed, ticks, board=None, endless=False):
+    options = {"board": board, "endless": endless} if board else {}
+    world = World(seed, **options)
+    recording = Recording(seed, **options)
+    state = InputState()
+    rng = random.Random(seed)
+
+    def apply(code, value=0):
+        recording.record(world.ticks, code, value)
+        state.apply(world, code, value)
+
+    apply(BALL_SPEED, 6)
+    while world.running and world.ticks < ticks:
+        if rng.random() < 0.1:
+            key = rng.choice(((LEFT_DOWN, LEFT_UP), (RIGHT_DOWN, RIGHT_UP)))
+            apply(key[0] if rng.random() < 0.5 else key[1], rng.randrange(8))
+        if world.ticks == ticks // 2:
+            apply(PAUSE)
+            apply(PAUSE)
+        world.step(state.inputs())
+    recording.length = world.ticks
+    return world, recording
+
+
+def assert_same(replayed, world):
+    assert replayed.ticks == world.ticks
+    assert (replayed.score, replayed.lives, replayed.running) == (world.score, world.lives, world.running)
+    assert replayed.paddle.coords() == world.paddle.coords()
+    assert list(replayed.balls.x) == list(world.balls.x)
+    assert list(replayed.balls.y) == list(world.balls.y)
+
+
+def test_recording_round_trip(tmp_path):
+    world, recording = record_session(5, 3000)
+    path = tmp_path / "session.cbr"
+    recording.save(path)
+    loaded = Recording.load(path)
+    assert loaded.events == recording.events
+    assert loaded.length == recording.length
+    assert_same(Player(loaded).run_to_end(), world)
+
+
+def test_replay_reaches_game_over():
+    world, recording = record_session(0, 20000)
+    assert not world.running
+    assert_same(Player(Recording.from_bytes(recording.to_bytes())).run_to_end(), world)
+
+
+def test_seek_back_matches_straight_playback():
+    world, recording = record_session(9, 2500)
+    player = Player(recording, snapshot_every=300)
+    player.run_to_end()
+    middle = Player(recording).run_until(1000)
+    assert_same(player.seek(1000), middle)
+
+
+def test_seek_back_and_forth():
+    world, recording = record_session(3, 3000)
+    player = Player(recording, snapshot_every=200)
+    for tick in (2500, 400, 1800, 1799, 2999):
+        expected = Player(recording).run_until(tick)
+        assert_same(player.seek(tick), expected)
+    assert_same(player.run_to_end(), world)
+
+
+def test_sub_tick_offsets_split_a_tick():
+    state = InputState()
+    state.apply(None, RIGHT_DOWN, SUBTICKS // 4)
+    state.apply(None, RIGHT_UP, SUBTICKS * 3 // 4)
+    assert state.inputs() == (0, 0.5)
+    assert state.inputs() == (False, False)
+
+
+def test_rejects_foreign_data():
+    with pytest.raises(ValueError):
+        Recording.from_bytes(b"PNG\r" + bytes(32))
+
+
+def test_endless_board_round_trip():
+    board = Board(820, 640, 6, 14)
+    world, recording = record_session(11, 2000, board, endless=True)
+    loaded = Recording.from_bytes(recording.to_bytes())
+    assert (loaded.board, loaded.endless) == (board, True)
+    assert_same(Player(loaded).run_to_end(), world)
@@ -0,0 +1,21 @@
+from soak import ResourceMonitor
+
+
+def monitor_for(series):
+    samples = iter(series)
+    monitor = ResourceMonitor(lambda: {"counter": next(samples)})
+    for _ in series:
+        monitor.sample()
+    return monitor
+
+
+def test_steady_growth_is_a_leak():
+    assert monitor_for([10 * i for i in range(40)]).leaks() == [("counter", 120, 390)]
+
+
+def test_a_counter_that_fills_up_to_its_bound_is_not_a_leak():
+    assert monitor_for([min(i * 20, 600) for i in range(40)]).leaks() == []
+
+
+def test_a_sawtooth_is_not_a_leak():
+    assert monitor_for([(i % 7) * 50 for i in range(40)]).leaks() == []
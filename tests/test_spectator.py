@@ -0,0 +1,47 @@
+from array import array
+
+from conftest import play_until_over
+from engine import World, Inputs
+from spectator import FRAME, SNAPSHOT, DELTA, RUNNING, NO_MAIN, Mirror, capture, encode
+
+
+def decode(mirror, message):
+    size, kind = FRAME.unpack_from(message)
+    assert size == len(message) - FRAME.size
+    mirror.apply(message[FRAME.size:])
+    return kind
+
+
+def test_snapshot_and_delta_round_trip():
+    world = World(3)
+    old = capture(world)
+    mirror = Mirror()
+    assert decode(mirror, encode(None, old)) == SNAPSHOT
+    for _ in range(120):
+        world.step(Inputs(right=True))
+    new = capture(world)
+    assert decode(mirror, encode(old, new)) == DELTA
+
+    assert mirror.tick == world.ticks
+    assert (mirror.score, mirror.highscore, mirror.lives) == (world.score, world.highscore, world.lives)
+    assert mirror.flags & RUNNING
+    assert mirror.paddle == world.paddle.coords()
+    assert set(mirror.bricks) == {brick.id for brick in world.bricks}
+    assert mirror.main == world.balls.index(world.ball)
+    n = len(world.balls)
+    assert list(mirror.xs) == list(array("f", world.balls.x[:n]))
+    assert list(mirror.ys) == list(array("f", world.balls.y[:n]))
+    assert tuple(mirror.size) == (world.board.width, world.board.height)
+
+
+def test_finished_world_has_no_main_ball():
+    world = World(0)
+    play_until_over(world)
+    assert not world.running
+    state = capture(world)
+    mirror = Mirror()
+    decode(mirror, encode(None, state))
+    assert mirror.lives == 0
+    assert not mirror.flags & RUNNING
+    assert mirror.main == NO_MAIN
+    assert len(mirror.xs) == len(world.balls)
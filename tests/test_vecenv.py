@@ -0,0 +1,93 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from constants import CHAOS_EVENTS, WINDOW_HEIGHT
+from vecenv import VecEnv, OBS_SIZE, STAY, LEFT, RIGHT
+
+
+def make_env(n=8, **options):
+    env = VecEnv(n, **options)
+    env.reset(np.arange(n))
+    return env
+
+
+def test_reset_and_step_shapes():
+    env = VecEnv(4)
+    obs = env.reset(np.arange(4))
+    assert obs.shape == (4, OBS_SIZE) and obs.dtype == np.float32
+    obs, rewards, dones, infos = env.step(np.array([STAY, LEFT, RIGHT, STAY]))
+    assert obs.shape == (4, OBS_SIZE)
+    assert rewards.shape == dones.shape == infos["lives_lost"].shape == infos["score"].shape == (4,)
+    assert not dones.any()
+
+
+def test_reward_is_100_per_brick():
+    env = make_env(16, chaos_chance=0)
+    actions = np.random.default_rng(0).integers(3, size=(800, 16))
+    scored = 0
+    for step in actions:
+        before = env.bricks.sum(axis=(1, 2))
+        _, rewards, _, _ = env.step(step)
+        after = env.bricks.sum(axis=(1, 2))
+        same_level = after <= before
+        assert (rewards[same_level] == 100 * (before - after)[same_level]).all()
+        scored += rewards.sum()
+    assert scored > 0
+
+
+def test_done_once_when_the_last_life_is_lost():
+    env = make_env(2, chaos_chance=0)
+    env.lives[0] = 1
+    env.ball_y[0, 0] = WINDOW_HEIGHT - 12
+    env.ball_dy[0, 0] = 5
+    _, _, dones, infos = env.step(np.zeros(2, int))
+    assert dones.tolist() == [True, False]
+    assert env.lives[0] == 0 and infos["lives_lost"][0] == 1
+    ticks = env.ticks[0]
+    _, rewards, dones, _ = env.step(np.zeros(2, int))
+    assert not dones.any() and rewards[0] == 0 and env.ticks[0] == ticks
+
+
+def test_masked_reset_only_touches_masked_games():
+    env = make_env(4, chaos_chance=0)
+    for _ in range(50):
+        env.step(np.full(4, RIGHT))
+    before = env.ticks.copy()
+    mask = np.array([True, False, True, False])
+    env.reset(np.arange(10, 14), mask)
+    assert env.ticks.tolist() == [0, before[1], 0, before[3]]
+    assert (env.lives[mask] == 3).all()
+
+
+def test_masked_first_reset_is_rejected():
+    env = VecEnv(2)
+    with pytest.raises(ValueError):
+        env.reset(np.arange(2), np.array([True, False]))
+
+
+def test_claim_bricks_removes_a_brick_once():
+    env = make_env(2, chaos_chance=0)
+    row, column = np.argwhere(env.bricks[0])[0]
+    found = np.zeros((2, 3), bool)
+    found[0, :] = True
+    rows = np.full((2, 3), row)
+    columns = np.full((2, 3), column)
+    score = env.score.copy()
+    winners, hits = env.claim_bricks(found, rows, columns)
+    assert winners[0].tolist() == [True, False, False]
+    assert hits.tolist() == [1, 0]
+    assert not env.bricks[0, row, column]
+    assert (env.score - score).tolist() == [100, 0]
+
+
+def test_every_chaos_event_fires():
+    env = make_env(64, chaos_chance=1.0, chaos_duration=(500, 1000), lives=10 ** 6)
+    seen = np.zeros(len(CHAOS_EVENTS), bool)
+    rng = np.random.default_rng(1)
+    for _ in range(600):
+        env.step(rng.integers(3, size=64))
+        seen |= env.active.any(axis=0)
+        if seen.all():
+            break
+    assert seen.all()
@@ -0,0 +1,417 @@
+import argparse
+import math
+import random
+import sys
+import time
+
+import numpy as np
+
+from balls import DIAMETER, BALL_RADIUS
+from constants import (
+    WINDOW_WIDTH, WINDOW_HEIGHT, PADDLE_WIDTH, PADDLE_HEIGHT, BRICK_ROWS, BRICK_COLUMNS, BRICK_WIDTH, BRICK_HEIGHT,
+    TICK_MS, PASTEL_COLORS, CHAOS_EVENTS
+)
+from levels import ORIGIN_X, ORIGIN_Y, CELLS, generate_layout
+
+STAY = 0
+LEFT = 1
+RIGHT = 2
+
+EFFECT_INDEX = {effect: i for i, effect in enumerate(CHAOS_EVENTS)}
+REVERSE, MULTIBALL, BIGPADDLE, GHOSTBALL, SHRINKPAD, INVISIBLEPAD, DRUNKPAD, PARTYBRICKS, CONFUSION, DARKNESS, \
+    SPLITPAD, SLIPPERY, GUNPAD, SHUFFLER, FLIPVIEW = (EFFECT_INDEX[effect] for effect in CHAOS_EVENTS)
+
+PADDLE_Y = WINDOW_HEIGHT - 40
+MAX_SUBSTEP_PX = 8
+MAX_BULLETS = 32
+CANDIDATES = ((0, 0), (0, 1), (1, 0), (1, 1))
+OBS_SIZE = 11 + len(CHAOS_EVENTS) + CELLS
+
+
+class VecEnv:
+    def __init__(self, n, ball_speed=5, paddle_speed=8, chaos_chance=1.0, chaos_duration=(3000, 10000),
+                 multiball_count=1, max_balls=16, lives=3):
+        self.n = n
+        self.ball_speed = ball_speed
+        self.paddle_speed = paddle_speed
+        self.chaos_chance = chaos_chance
+        self.chaos_duration = chaos_duration
+        self.multiball_count = multiball_count
+        self.max_balls = max_balls
+        self.start_lives = lives
+        self.games = np.arange(n)
+        self.level_rngs = [None] * n
+        self.rng = None
+
+        self.now = np.zeros(n, np.int64)
+        self.ticks = np.zeros(n, np.int64)
+        self.score = np.zeros(n, np.int64)
+        self.lives = np.zeros(n, np.int64)
+        self.paddle_x1 = np.zeros(n)
+        self.paddle_width = np.zeros(n)
+        self.split_x1 = np.zeros((n, 2))
+        self.slippery_velocity = np.zeros(n)
+        self.drunk_direction = np.zeros(n)
+
+        self.ball_x = np.zeros((n, max_balls))
+        self.ball_y = np.zeros((n, max_balls))
+        self.ball_dx = np.zeros((n, max_balls))
+        self.ball_dy = np.zeros((n, max_balls))
+        self.ball_alive = np.zeros((n, max_balls), bool)
+
+        self.bullet_x = np.zeros((n, MAX_BULLETS))
+        self.bullet_y = np.zeros((n, MAX_BULLETS))
+        self.bullet_alive = np.zeros((n, MAX_BULLETS), bool)
+
+        self.bricks = np.zeros((n, BRICK_ROWS, BRICK_COLUMNS), bool)
+        self.colors = np.zeros((n, BRICK_ROWS, BRICK_COLUMNS), np.uint8)
+
+        self.active = np.zeros((n, len(CHAOS_EVENTS)), bool)
+        self.effect_start = np.zeros((n, len(CHAOS_EVENTS)), np.int64)
+        self.effect_end = np.zeros((n, len(CHAOS_EVENTS)), np.int64)
+
+    def reset(self, seeds, mask=None):
+        seeds = np.asarray(seeds)
+        if mask is None:
+            self.rng = np.random.default_rng(seeds.tolist())
+            mask = np.ones(self.n, bool)
+        elif self.rng is None:
+            raise ValueError("the first reset() must start every game; call it without a mask")
+        games = np.flatnonzero(mask)
+        for game, seed in zip(games, seeds[games] if len(seeds) == self.n else seeds):
+            self.level_rngs[game] = random.Random(int(seed))
+        self.now[mask] = 0
+        self.ticks[mask] = 0
+        self.score[mask] = 0
+        self.lives[mask] = self.start_lives
+        self.new_level(mask)
+        return self.observe()
+
+    def new_level(self, mask):
+        self.active[mask] = False
+        self.slippery_velocity[mask] = 0
+        self.drunk_direction[mask] = 0
+        self.bullet_alive[mask] = False
+        self.paddle_width[mask] = PADDLE_WIDTH
+        self.paddle_x1[mask] = WINDOW_WIDTH // 2 - PADDLE_WIDTH // 2
+        self.ball_alive[mask] = False
+        self.spawn_main(mask)
+        for game in np.flatnonzero(mask):
+            mask_bits, colors = generate_layout(self.level_rngs[game])
+            cells = np.array([mask_bits >> cell & 1 for cell in range(CELLS)], bool)
+            self.bricks[game] = cells.reshape(BRICK_ROWS, BRICK_COLUMNS)
+            self.colors[game] = np.frombuffer(colors, np.uint8).reshape(BRICK_ROWS, BRICK_COLUMNS)
+
+    def spawn_main(self, mask):
+        self.ball_x[mask, 0] = WINDOW_WIDTH // 2 - BALL_RADIUS
+        self.ball_y[mask, 0] = WINDOW_HEIGHT // 2 - BALL_RADIUS
+        self.ball_dx[mask, 0] = self.ball_speed
+        self.ball_dy[mask, 0] = -self.ball_speed
+        self.ball_alive[mask, 0] = True
+
+    def step(self, actions):
+        running = self.lives > 0
+        self.now[running] += TICK_MS
+        self.ticks[running] += 1
+        start_score = self.score.copy()
+        start_lives = self.lives.copy()
+
+        self.move_paddles(np.asarray(actions), running)
+        self.update_bullets(running)
+        self.run_effects(running)
+        self.update_balls(running)
+
+        cleared = running & ~self.bricks.any(axis=(1, 2))
+        if cleared.any():
+            self.new_level(cleared)
+
+        rewards = self.score - start_score
+        dones = running & (self.lives <= 0)
+        infos = {"lives_lost": start_lives - self.lives, "score": self.score.copy()}
+        return self.observe(), rewards, dones, infos
+
+    def move_paddles(self, actions, running):
+        speed = self.paddle_speed
+        dx = np.where(actions == RIGHT, speed, np.where(actions == LEFT, -speed, 0)).astype(float)
+        active = self.active
+        dx = np.where(active[:, REVERSE], -dx, dx)
+        dx += np.where(active[:, DRUNKPAD], self.drunk_direction * 2, 0)
+
+        slippery = active[:, SLIPPERY]
+        velocity = np.where(dx == 0, self.slippery_velocity * 0.95, self.slippery_velocity + dx * 0.1)
+        self.slippery_velocity = np.where(slippery, velocity, self.slippery_velocity)
+        dx = np.where(slippery, self.slippery_velocity, dx)
+        dx = np.where(running, dx, 0)
+
+        split = active[:, SPLITPAD]
+        width = self.paddle_width
+        main = np.clip(self.paddle_x1 + dx, 0, WINDOW_WIDTH - width)
+        self.paddle_x1 = np.where(split, self.paddle_x1, main)
+        directions = np.stack([dx, -dx], axis=1)
+        moved = np.clip(self.split_x1 + directions, 0, (WINDOW_WIDTH - width)[:, None])
+        self.split_x1 = np.where(split[:, None], moved, self.split_x1)
+
+    def first_brick(self, x1, y1, x2, y2, ignore=None):
+        column = np.floor((x1 - ORIGIN_X) / BRICK_WIDTH).astype(np.int64)
+        row = np.floor((y1 - ORIGIN_Y) / BRICK_HEIGHT).astype(np.int64)
+        games = np.broadcast_to(self.games.reshape((-1,) + (1,) * (x1.ndim - 1)), x1.shape)
+        found = np.zeros(x1.shape, bool)
+        hit_row = np.zeros(x1.shape, np.int64)
+        hit_column = np.zeros(x1.shape, np.int64)
+        for dr, dc in CANDIDATES:
+            r = row + dr
+            c = column + dc
+            valid = (r >= 0) & (r < BRICK_ROWS) & (c >= 0) & (c < BRICK_COLUMNS)
+            rc = np.where(valid, r, 0)
+            cc = np.where(valid, c, 0)
+            bx1 = ORIGIN_X + cc * BRICK_WIDTH
+            by1 = ORIGIN_Y + rc * BRICK_HEIGHT
+            hit = (valid & self.bricks[games, rc, cc] & ~found &
+                   (x2 >= bx1) & (x1 <= bx1 + BRICK_WIDTH - 4) & (y2 >= by1) & (y1 <= by1 + BRICK_HEIGHT - 4))
+            if ignore is not None:
+                hit &= ~ignore
+            hit_row = np.where(hit, rc, hit_row)
+            hit_column = np.where(hit, cc, hit_column)
+            found |= hit
+        return found, hit_row, hit_column
+
+    def claim_bricks(self, found, rows, columns):
+        # Several balls or bullets can reach the same brick in one pass; only the first in slot order removes it
+        games = np.broadcast_to(self.games[:, None], found.shape)[found]
+        keys = (games * BRICK_ROWS + rows[found]) * BRICK_COLUMNS + columns[found]
+        _, first = np.unique(keys, return_index=True)
+        winners = np.zeros(found.shape, bool)
+        winners[tuple(index[first] for index in np.nonzero(found))] = True
+        self.bricks[games[first], rows[found][first], columns[found][first]] = False
+        hits = np.bincount(games[first], minlength=self.n)
+        self.score += 100 * hits
+        return winners, hits
+
+    def update_bullets(self, running):
+        alive = self.bullet_alive
+        self.bullet_y[alive] -= 10
+        alive &= self.bullet_y + 10 >= 0
+        if not alive.any():
+            self.trigger_chaos(np.zeros(self.n, np.int64), running)
+            return
+        x1 = self.bullet_x - 2
+        found, rows, columns = self.first_brick(x1, self.bullet_y, x1 + 4, self.bullet_y + 10, ~alive)
+        hits = np.zeros(self.n, np.int64)
+        if found.any():
+            winners, hits = self.claim_bricks(found, rows, columns)
+            alive &= ~winners
+        self.trigger_chaos(hits, running)
+
+    def shoot(self, mask):
+        games = np.flatnonzero(mask)
+        if len(games) == 0:
+            return
+        free = ~self.bullet_alive[games]
+        has_free = free.any(axis=1)
+        games = games[has_free]
+        slots = free[has_free].argmax(axis=1)
+        self.bullet_x[games, slots] = self.paddle_x1[games] + self.paddle_width[games] / 2
+        self.bullet_y[games, slots] = PADDLE_Y - 10
+        self.bullet_alive[games, slots] = True
+
+    def trigger_chaos(self, hits, running):
+        candidates = running & (hits > 0) & ~self.active.any(axis=1)
+        draws = self.rng.random(self.n)
+        start = candidates & (draws < 1 - (1 - self.chaos_chance) ** hits)
+        if start.any():
+            games = np.flatnonzero(start)
+            effects = self.rng.integers(len(CHAOS_EVENTS), size=len(games))
+            low, high = self.chaos_duration
+            durations = self.rng.integers(low, high + 1, size=len(games))
+            self.activate(games, effects, durations)
+
+    def activate(self, games, effects, durations):
+        self.active[games, effects] = True
+        self.effect_start[games, effects] = self.now[games]
+        self.effect_end[games, effects] = self.now[games] + durations
+        for effect in np.unique(effects):
+            chosen = games[effects == effect]
+            mask = np.zeros(self.n, bool)
+            mask[chosen] = True
+            self.apply(effect, chosen, mask)
+
+    def apply(self, effect, games, mask):
+        if effect == MULTIBALL:
+            self.spawn_multiball(games)
+        elif effect in (BIGPADDLE, SHRINKPAD):
+            self.resize_paddles(games, 140 if effect == BIGPADDLE else 60)
+        elif effect == DRUNKPAD:
+            self.drunk_direction[games] = self.rng.choice([-1, 1], size=len(games))
+        elif effect == PARTYBRICKS:
+            self.colors[games] = self.rng.integers(len(PASTEL_COLORS), size=self.colors[games].shape)
+        elif effect == SPLITPAD:
+            half = self.paddle_width[games] // 2
+            self.split_x1[games, 0] = 80 - half
+            self.split_x1[games, 1] = WINDOW_WIDTH - 80 - half
+        elif effect == SLIPPERY:
+            self.slippery_velocity[games] = 0
+        elif effect == GUNPAD:
+            self.shoot(mask)
+        elif effect == SHUFFLER:
+            for game in games:
+                alive = self.bricks[game]
+                self.colors[game][alive] = self.rng.permutation(self.colors[game][alive])
+
+    def revert(self, effect, games):
+        if effect in (BIGPADDLE, SHRINKPAD):
+            self.resize_paddles(games, PADDLE_WIDTH)
+        elif effect == DRUNKPAD:
+            self.drunk_direction[games] = 0
+        elif effect == SLIPPERY:
+            self.slippery_velocity[games] = 0
+        elif effect == GUNPAD:
+            self.bullet_alive[games] = False
+
+    def resize_paddles(self, games, width):
+        center = self.paddle_x1[games] + self.paddle_width[games] / 2
+        split_centers = self.split_x1[games] + self.paddle_width[games, None] / 2
+        self.paddle_x1[games] = center - width // 2
+        self.split_x1[games] = split_centers - width // 2
+        self.paddle_width[games] = width
+
+    def spawn_multiball(self, games):
+        count = self.multiball_count
+        x = self.ball_x[games, 0]
+        y = self.ball_y[games, 0]
+        speed = self.ball_speed
+        for i in range(count):
+            dx = speed if count == 1 else speed * (2 * i / (count - 1) - 1)
+            free = ~self.ball_alive[games]
+            has_free = free.any(axis=1)
+            rows = games[has_free]
+            slots = free[has_free].argmax(axis=1)
+            self.ball_x[rows, slots] = x[has_free]
+            self.ball_y[rows, slots] = y[has_free]
+            self.ball_dx[rows, slots] = dx
+            self.ball_dy[rows, slots] = -speed
+            self.ball_alive[rows, slots] = True
+
+    def run_effects(self, running):
+        active = self.active
+        expired = active & (self.now[:, None] >= self.effect_end) & running[:, None]
+        if expired.any():
+            active &= ~expired
+            for effect in np.flatnonzero(expired.any(axis=0)):
+                self.revert(effect, np.flatnonzero(expired[:, effect]))
+
+        for effect, interval in ((PARTYBRICKS, 100), (GUNPAD, 300)):
+            elapsed = self.now - self.effect_start[:, effect]
+            due = active[:, effect] & running & (elapsed // interval > (elapsed - TICK_MS) // interval) & (elapsed > 0)
+            if due.any():
+                games = np.flatnonzero(due)
+                if effect == PARTYBRICKS:
+                    self.colors[games] = self.rng.integers(len(PASTEL_COLORS), size=self.colors[games].shape)
+                else:
+                    self.shoot(due)
+
+    def update_balls(self, running):
+        alive = self.ball_alive & running[:, None]
+        confusion = self.active[:, CONFUSION] & running
+        if confusion.any():
+            jitter = self.rng.integers(-1, 2, size=(2,) + alive.shape)
+            self.ball_dx += np.where(alive & confusion[:, None], jitter[0], 0)
+            self.ball_dy += np.where(alive & confusion[:, None], jitter[1], 0)
+
+        fastest = np.abs(np.where(alive, np.maximum(np.abs(self.ball_dx), np.abs(self.ball_dy)), 0)).max()
+        substeps = max(1, math.ceil(fastest / MAX_SUBSTEP_PX))
+        ghost = self.active[:, GHOSTBALL][:, None]
+        split = self.active[:, SPLITPAD][:, None]
+        hits = np.zeros(self.n, np.int64)
+        for _ in range(substeps):
+            x, y, dx, dy = self.ball_x, self.ball_y, self.ball_dx, self.ball_dy
+            x2 = x + DIAMETER
+            y2 = y + DIAMETER
+            hit_x = alive & (((x <= 0) & (dx < 0)) | ((x2 >= WINDOW_WIDTH) & (dx > 0)))
+            hit_y = alive & ~hit_x & (y <= 0) & (dy < 0)
+            miss = alive & ~hit_x & ~hit_y & (y2 >= WINDOW_HEIGHT)
+            free = alive & ~hit_x & ~hit_y & ~miss
+
+            toward = free & (dy > 0) & (y + BALL_RADIUS < PADDLE_Y + PADDLE_HEIGHT / 2)
+            width = self.paddle_width[:, None]
+            for paddle_x1, usable in ((self.paddle_x1[:, None], True), (self.split_x1[:, :1], split),
+                                      (self.split_x1[:, 1:], split)):
+                on_paddle = (toward & usable & (y2 >= PADDLE_Y) & (y <= PADDLE_Y + PADDLE_HEIGHT) &
+                             (x2 >= paddle_x1) & (x <= paddle_x1 + width))
+                hit_y |= on_paddle
+                free &= ~on_paddle
+
+            found, rows, columns = self.first_brick(x, y, x2, y2, ~(free & ~ghost))
+            if found.any():
+                winners, substep_hits = self.claim_bricks(found, rows, columns)
+                hits += substep_hits
+                bx1 = ORIGIN_X + columns * BRICK_WIDTH
+                by1 = ORIGIN_Y + rows * BRICK_HEIGHT
+                overlap_x = np.minimum(x2, bx1 + BRICK_WIDTH - 4) - np.maximum(x, bx1)
+                overlap_y = np.minimum(y2, by1 + BRICK_HEIGHT - 4) - np.maximum(y, by1)
+                hit_y |= winners & (overlap_x > overlap_y)
+                hit_x |= winners & (overlap_x <= overlap_y)
+
+            self.ball_dx = np.where(hit_x, -dx, dx)
+            self.ball_dy = np.where(hit_y, -dy, dy)
+            alive &= ~miss
+            self.ball_x = np.where(alive, x + self.ball_dx / substeps, x)
+            self.ball_y = np.where(alive, y + self.ball_dy / substeps, y)
+
+        self.ball_alive = alive | (self.ball_alive & ~running[:, None])
+        lost = running & ~self.ball_alive[:, 0]
+        if lost.any():
+            self.lives[lost] -= 1
+            self.spawn_main(lost & (self.lives > 0))
+        self.trigger_chaos(hits, running)
+
+    def observe(self):
+        obs = np.zeros((self.n, OBS_SIZE), np.float32)
+        flipped = self.active[:, FLIPVIEW]
+        hidden = self.active[:, INVISIBLEPAD] & ((self.now - self.effect_start[:, INVISIBLEPAD]) % 1000 >= 200)
+        split = self.active[:, SPLITPAD]
+        ball_y = np.where(flipped, WINDOW_HEIGHT - DIAMETER - self.ball_y[:, 0], self.ball_y[:, 0])
+        ball_dy = np.where(flipped, -self.ball_dy[:, 0], self.ball_dy[:, 0])
+        obs[:, 0] = self.paddle_x1 / WINDOW_WIDTH
+        obs[:, 1] = (self.paddle_x1 + self.paddle_width) / WINDOW_WIDTH
+        obs[:, 2] = ~(hidden | split)
+        obs[:, 3] = self.ball_x[:, 0] / WINDOW_WIDTH
+        obs[:, 4] = ball_y / WINDOW_HEIGHT
+        obs[:, 5] = self.ball_dx[:, 0] / self.ball_speed
+        obs[:, 6] = ball_dy / self.ball_speed
+        obs[:, 7] = np.where(split, self.split_x1[:, 0] / WINDOW_WIDTH, -1)
+        obs[:, 8] = np.where(split, self.split_x1[:, 1] / WINDOW_WIDTH, -1)
+        obs[:, 9] = self.ball_alive.sum(axis=1)
+        obs[:, 10] = self.lives
+        obs[:, 11:11 + len(CHAOS_EVENTS)] = self.active
+        bricks = np.where(flipped[:, None, None], self.bricks[:, ::-1], self.bricks)
+        obs[:, 11 + len(CHAOS_EVENTS):] = bricks.reshape(self.n, CELLS)
+        return obs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Throughput of the vectorized ChaosBreakout environment")
+    parser.add_argument("--envs", type=int, default=1024)
+    parser.add_argument("--steps", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    env = VecEnv(args.envs)
+    env.reset(np.arange(args.seed, args.seed + args.envs))
+    actions_rng = np.random.default_rng(args.seed)
+    episodes = 0
+    start = time.perf_counter()
+    for _ in range(args.steps):
+        actions = actions_rng.integers(3, size=args.envs)
+        _, _, dones, _ = env.step(actions)
+        if dones.any():
+            episodes += int(dones.sum())
+            env.reset(actions_rng.integers(2 ** 31, size=args.envs), dones)
+    elapsed = time.perf_counter() - start
+    rate = args.envs * args.steps / elapsed
+    print(f"{args.envs} games x {args.steps} steps in {elapsed:.2f}s: {rate:,.0f} game steps/s "
+          f"({rate * 3600 / 1e6:,.0f}M per hour), {episodes} episodes finished")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,15 @@
+from constants import WINDOW_HEIGHT
+
+
+class View:
+    def __init__(self, height=WINDOW_HEIGHT):
+        self.height = height
+        self.flipped = False
+
+    def rect(self, x1, y1, x2, y2):
+        if self.flipped:
+            return x1, self.height - y2, x2, self.height - y1
+        return x1, y1, x2, y2
+
+    def y(self, y):
+        return self.height - y if self.flipped else y